@@ -1,7 +1,11 @@
 # 2
 import sys
 import os
+import stat
+import errno
+import time
 import zlib
+from concurrent.futures import ThreadPoolExecutor
 
 # Error codes
 E_USAGE = "E_USAGE"
@@ -13,6 +17,28 @@ E_WRITE = "E_WRITE"
 E_CLOSE = "E_CLOSE"
 E_RANGE = "E_RANGE"
 
+# Copy engines selectable with --engine
+ENGINES = ["auto", "rw", "readinto", "copy_file_range", "sendfile", "splice"]
+
+# Order in which --engine auto tries the in-kernel engines
+AUTO_ENGINES = ["copy_file_range", "sendfile", "splice"]
+
+# Bytes requested per in-kernel copy call (the data never enters Python)
+KERNEL_CHUNK = 8 * 1024 * 1024
+
+# Smallest byte range handed to a --jobs worker
+RANGE_MIN = 1024 * 1024
+
+# errno values meaning "this engine cannot handle these fds", not a real I/O error
+UNSUPPORTED_ERRNOS = {errno.EXDEV, errno.EINVAL, errno.ENOSYS,
+                      errno.EOPNOTSUPP, errno.EBADF, errno.ESPIPE}
+
+# Cached CRC32 zero-byte operators, ZERO_OPS[k] covers 2**k bytes
+ZERO_OPS = []
+
+# Instrumentation printed by --stats (syscalls issued, buffer bytes allocated)
+STATS = {"syscalls": 0, "alloc": 0}
+
 def error_exit(code, message):
     """Print error message and exit with non-zero status."""
     print(f"ERROR: {code}: {message}", file=sys.stderr)
@@ -24,6 +50,12 @@ def parse_arguments(args):
     dst = None
     buffer_size = 4096  # Default buffer size
     force = False
+    engine = "auto"
+    jobs = 1
+    show_stats = False
+    sparse = False
+    manifest = None
+    concurrency = 4
     
     i = 0
     while i < len(args):
@@ -45,22 +77,77 @@ def parse_arguments(args):
             except ValueError:
                 error_exit(E_USAGE, "buffer size must be an integer")
             i += 2
+        elif args[i] == "--engine":
+            if i + 1 >= len(args):
+                error_exit(E_USAGE, "missing value for --engine")
+            engine = args[i + 1]
+            if engine not in ENGINES:
+                error_exit(E_USAGE, "engine must be one of " + "|".join(ENGINES))
+            i += 2
+        elif args[i] == "--jobs":
+            if i + 1 >= len(args):
+                error_exit(E_USAGE, "missing value for --jobs")
+            try:
+                jobs = int(args[i + 1])
+            except ValueError:
+                error_exit(E_USAGE, "jobs must be an integer")
+            i += 2
+        elif args[i] == "--manifest":
+            if i + 1 >= len(args):
+                error_exit(E_USAGE, "missing value for --manifest")
+            manifest = args[i + 1]
+            i += 2
+        elif args[i] == "--concurrency":
+            if i + 1 >= len(args):
+                error_exit(E_USAGE, "missing value for --concurrency")
+            try:
+                concurrency = int(args[i + 1])
+            except ValueError:
+                error_exit(E_USAGE, "concurrency must be an integer")
+            i += 2
         elif args[i] == "--force":
             force = True
             i += 1
+        elif args[i] == "--stats":
+            show_stats = True
+            i += 1
+        elif args[i] == "--sparse":
+            sparse = True
+            i += 1
         else:
             error_exit(E_USAGE, f"unrecognized argument: {args[i]}")
     
-    if src is None:
-        error_exit(E_USAGE, "missing required --src")
-    if dst is None:
-        error_exit(E_USAGE, "missing required --dst")
+    if manifest is not None:
+        # Pairs come from the manifest instead of --src/--dst
+        if src is not None or dst is not None:
+            error_exit(E_USAGE, "--manifest cannot be combined with --src/--dst")
+    else:
+        if src is None:
+            error_exit(E_USAGE, "missing required --src")
+        if dst is None:
+            error_exit(E_USAGE, "missing required --dst")
     
     # Validate buffer size
     if buffer_size < 1 or buffer_size > 1048576:  # 1..1048576 bytes
         error_exit(E_RANGE, "buffer size must be 1..1048576 bytes")
     
-    return src, dst, buffer_size, force
+    if jobs < 1 or jobs > 64:
+        error_exit(E_RANGE, "jobs must be 1..64")
+    
+    if concurrency < 1 or concurrency > 64:
+        error_exit(E_RANGE, "concurrency must be 1..64")
+    
+    options = {
+        "buffer_size": buffer_size,
+        "force": force,
+        "engine": engine,
+        "jobs": jobs,
+        "stats": show_stats,
+        "sparse": sparse,
+        "manifest": manifest,
+        "concurrency": concurrency,
+    }
+    return src, dst, options
 
 def open_source(src_path):
     """Open source file or stdin."""
@@ -98,6 +185,7 @@ def open_destination(dst_path, force):
 def copy_file(fd_src, fd_dst, buffer_size):
     """
     Copy from fd_src to fd_dst using buffer_size chunks.
+    Allocates a new bytes object per read and a slice per partial write.
     Returns (bytes_copied, crc32_value)
     """
     bytes_copied = 0
@@ -109,6 +197,8 @@ def copy_file(fd_src, fd_dst, buffer_size):
             chunk = os.read(fd_src, buffer_size)
         except OSError as e:
             error_exit(E_READ, f"read error: {e.strerror}")
+        STATS["syscalls"] += 1
+        STATS["alloc"] += len(chunk)
         
         # EOF reached
         if not chunk:
@@ -121,6 +211,9 @@ def copy_file(fd_src, fd_dst, buffer_size):
                 written = os.write(fd_dst, chunk[bytes_written:])
             except OSError as e:
                 error_exit(E_WRITE, f"write error: {e.strerror}")
+            STATS["syscalls"] += 1
+            if bytes_written:
+                STATS["alloc"] += len(chunk) - bytes_written
             
             if written == 0:
                 error_exit(E_WRITE, "write returned 0 bytes")
@@ -133,6 +226,445 @@ def copy_file(fd_src, fd_dst, buffer_size):
     
     return bytes_copied, crc32
 
+def copy_file_readinto(fd_src, fd_dst, buffer_size):
+    """
+    Copy from fd_src to fd_dst through one preallocated bytearray.
+    Reads land in the buffer via readv and partial writes resend a
+    memoryview slice, so the loop allocates nothing per iteration.
+    Returns (bytes_copied, crc32_value)
+    """
+    bytes_copied = 0
+    crc32 = 0
+    buf = bytearray(buffer_size)
+    view = memoryview(buf)
+    STATS["alloc"] += buffer_size
+
+    try:
+        while True:
+            try:
+                n = os.readv(fd_src, [buf])
+            except OSError as e:
+                error_exit(E_READ, f"read error: {e.strerror}")
+            STATS["syscalls"] += 1
+
+            # EOF reached
+            if n == 0:
+                break
+
+            bytes_written = 0
+            while bytes_written < n:
+                try:
+                    written = os.write(fd_dst, view[bytes_written:n])
+                except OSError as e:
+                    error_exit(E_WRITE, f"write error: {e.strerror}")
+                STATS["syscalls"] += 1
+
+                if written == 0:
+                    error_exit(E_WRITE, "write returned 0 bytes")
+
+                bytes_written += written
+
+            crc32 = zlib.crc32(view[:n], crc32)
+            bytes_copied += n
+    finally:
+        view.release()
+
+    return bytes_copied, crc32
+
+def prepare_files(fd_src, fd_dst, preallocate):
+    """
+    Hint sequential access on the source and, when its size is known and
+    preallocate is set, reserve the destination blocks up front.
+    Returns the preallocated length (0 if nothing was reserved).
+    """
+    if not is_regular(fd_src):
+        return 0
+
+    try:
+        size = os.fstat(fd_src).st_size
+        os.posix_fadvise(fd_src, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        STATS["syscalls"] += 1
+    except (OSError, AttributeError):
+        return 0
+
+    if not preallocate or size == 0 or not is_regular(fd_dst):
+        return 0
+
+    try:
+        os.posix_fallocate(fd_dst, 0, size)
+        STATS["syscalls"] += 1
+    except (OSError, AttributeError):
+        # Not supported by this filesystem: the copy simply grows the file
+        return 0
+
+    return size
+
+def is_regular(fd):
+    """Return True if fd refers to a regular file."""
+    try:
+        return stat.S_ISREG(os.fstat(fd).st_mode)
+    except OSError:
+        return False
+
+def source_start(fd):
+    """
+    Offset a regular source is read from next, or None when its size and
+    offsets do not describe its data: not a regular file, or st_size 0
+    (procfs/sysfs files have content anyway and generate it afresh on
+    every read), so only a sequential read loop copies it faithfully.
+    """
+    try:
+        st = os.fstat(fd)
+        if not stat.S_ISREG(st.st_mode) or st.st_size == 0:
+            return None
+        return os.lseek(fd, 0, os.SEEK_CUR)
+    except OSError:
+        return None
+
+def kernel_copy_call(engine, fd_src, fd_dst, count, pipe_fds):
+    """
+    Perform one in-kernel copy step of at most count bytes.
+    Both fds advance their file positions. Returns bytes copied (0 at EOF).
+    """
+    if engine == "copy_file_range":
+        return os.copy_file_range(fd_src, fd_dst, count)
+    if engine == "sendfile":
+        return os.sendfile(fd_dst, fd_src, None, count)
+
+    # splice: file -> pipe -> file, the pipe acts as the kernel buffer
+    pipe_r, pipe_w = pipe_fds
+    moved = os.splice(fd_src, pipe_w, count)
+    drained = 0
+    while drained < moved:
+        try:
+            out = os.splice(pipe_r, fd_dst, moved - drained)
+        except OSError as e:
+            # The source already advanced past the bytes in the pipe: rewind
+            # it so a fallback engine can copy them, or give up
+            if drained == 0:
+                try:
+                    os.lseek(fd_src, -moved, os.SEEK_CUR)
+                except OSError:
+                    error_exit(E_WRITE, f"splice error: {e.strerror}")
+                raise
+            error_exit(E_WRITE, f"splice error: {e.strerror}")
+        if out == 0:
+            error_exit(E_WRITE, "splice returned 0 bytes")
+        drained += out
+    return moved
+
+def copy_file_kernel(fd_src, fd_dst, engine):
+    """
+    Copy from fd_src to fd_dst without bouncing data through Python.
+    Returns bytes copied, or None if the engine is not supported for
+    these fds (nothing has been copied in that case).
+    """
+    bytes_copied = 0
+    pipe_fds = os.pipe() if engine == "splice" else None
+
+    try:
+        while True:
+            try:
+                n = kernel_copy_call(engine, fd_src, fd_dst, KERNEL_CHUNK, pipe_fds)
+                STATS["syscalls"] += 2 if engine == "splice" else 1
+            except OSError as e:
+                # Unsupported on the first call: let the caller pick another engine
+                if bytes_copied == 0 and e.errno in UNSUPPORTED_ERRNOS:
+                    return None
+                error_exit(E_WRITE, f"{engine} error: {e.strerror}")
+
+            if n == 0:
+                break
+            bytes_copied += n
+    finally:
+        if pipe_fds is not None:
+            for fd in pipe_fds:
+                os.close(fd)
+
+    return bytes_copied
+
+def crc32_of_source(fd_src, start, length):
+    """
+    CRC32 of length bytes of a regular file from offset start, read with
+    pread in a side pass after the kernel copy (the pages are already
+    cached). The kernel engines copy from the current position, which is
+    not 0 for a partly read stdin.
+    """
+    crc32 = 0
+    offset = start
+    end = start + length
+    while offset < end:
+        try:
+            chunk = os.pread(fd_src, min(KERNEL_CHUNK, end - offset), offset)
+        except OSError as e:
+            error_exit(E_READ, f"cannot read source for CRC32: {e.strerror}")
+        STATS["syscalls"] += 1
+        if not chunk:
+            error_exit(E_READ, "source changed size during copy")
+        crc32 = zlib.crc32(chunk, crc32)
+        offset += len(chunk)
+
+    return crc32
+
+def copy_with_engine(fd_src, fd_dst, buffer_size, engine):
+    """
+    Copy using the requested engine, falling back to the read/write loop
+    when source_start() finds no usable offset (stdin pipes, procfs) or
+    the kernel refuses every in-kernel engine for this pair of fds.
+    Returns (bytes_copied, crc32_value)
+    """
+    if engine == "rw":
+        return copy_file(fd_src, fd_dst, buffer_size)
+    start = source_start(fd_src)
+    if engine == "readinto" or start is None:
+        return copy_file_readinto(fd_src, fd_dst, buffer_size)
+
+    candidates = AUTO_ENGINES if engine == "auto" else [engine]
+    for candidate in candidates:
+        bytes_copied = copy_file_kernel(fd_src, fd_dst, candidate)
+        if bytes_copied is not None:
+            return bytes_copied, crc32_of_source(fd_src, start, bytes_copied)
+
+    return copy_file_readinto(fd_src, fd_dst, buffer_size)
+
+def gf2_matrix_times(mat, vec):
+    """Multiply a 32x32 GF(2) matrix (list of column words) by a vector."""
+    total = 0
+    i = 0
+    while vec:
+        if vec & 1:
+            total ^= mat[i]
+        vec >>= 1
+        i += 1
+    return total
+
+def gf2_matrix_square(mat):
+    """Return mat * mat over GF(2)."""
+    return [gf2_matrix_times(mat, mat[n]) for n in range(32)]
+
+def zero_operator(k):
+    """
+    Return the GF(2) operator that feeds 2**k zero bytes through the CRC32
+    register. Built by repeated squaring and cached in ZERO_OPS.
+    """
+    if not ZERO_OPS:
+        # Operator for one zero bit, squared three times gives one zero byte
+        op = [0xedb88320] + [1 << n for n in range(31)]
+        for _ in range(3):
+            op = gf2_matrix_square(op)
+        ZERO_OPS.append(op)
+
+    while len(ZERO_OPS) <= k:
+        ZERO_OPS.append(gf2_matrix_square(ZERO_OPS[-1]))
+
+    return ZERO_OPS[k]
+
+def crc32_shift(reg, nbytes):
+    """Advance a raw CRC32 register over nbytes zero bytes."""
+    k = 0
+    while nbytes:
+        if nbytes & 1:
+            reg = gf2_matrix_times(zero_operator(k), reg)
+        nbytes >>= 1
+        k += 1
+    return reg
+
+def crc32_combine(crc1, crc2, len2):
+    """
+    Combine CRC32(A) and CRC32(B) into CRC32(A + B), where len2 = len(B).
+    Same math as zlib's crc32_combine(): shift crc1 over len2 zero bytes,
+    then xor in crc2.
+    """
+    if len2 <= 0:
+        return crc1
+    return crc32_shift(crc1, len2) ^ crc2
+
+def crc32_zeros(crc32, nbytes):
+    """Return zlib.crc32(bytes(nbytes), crc32) without touching nbytes of memory."""
+    if nbytes <= 0:
+        return crc32
+    return crc32_shift(crc32 ^ 0xffffffff, nbytes) ^ 0xffffffff
+
+def split_ranges(size, jobs):
+    """Split [0, size) into contiguous (start, end) ranges for the workers."""
+    count = max(1, min(jobs * 4, -(-size // RANGE_MIN)))
+    step = -(-size // count)
+    return [(start, min(start + step, size)) for start in range(0, size, step)]
+
+def copy_range(fd_src, fd_dst, start, end, buffer_size):
+    """
+    Copy bytes [start, end) with preadv/pwrite (no shared file position)
+    through one bytearray owned by this range.
+    Returns (bytes_copied, crc32_of_range, syscalls)
+    """
+    crc32 = 0
+    offset = start
+    syscalls = 0
+    buf = bytearray(min(buffer_size, end - start))
+    view = memoryview(buf)
+
+    try:
+        while offset < end:
+            want = min(len(buf), end - offset)
+            try:
+                n = os.preadv(fd_src, [view[:want]], offset)
+            except OSError as e:
+                error_exit(E_READ, f"read error: {e.strerror}")
+            syscalls += 1
+
+            # Source shrank under us
+            if n == 0:
+                break
+
+            bytes_written = 0
+            while bytes_written < n:
+                try:
+                    written = os.pwrite(fd_dst, view[bytes_written:n], offset + bytes_written)
+                except OSError as e:
+                    error_exit(E_WRITE, f"write error: {e.strerror}")
+                syscalls += 1
+
+                if written == 0:
+                    error_exit(E_WRITE, "write returned 0 bytes")
+
+                bytes_written += written
+
+            crc32 = zlib.crc32(view[:n], crc32)
+            offset += n
+    finally:
+        view.release()
+
+    return offset - start, crc32, syscalls
+
+def copy_file_parallel(fd_src, fd_dst, buffer_size, jobs):
+    """
+    Copy a regular file as independent byte ranges on a thread pool
+    (pread/pwrite and zlib release the GIL), then merge the per-range
+    CRC32 values in order with crc32_combine.
+    Returns (bytes_copied, crc32_value)
+    """
+    try:
+        size = os.fstat(fd_src).st_size
+    except OSError as e:
+        error_exit(E_READ, f"cannot stat source: {e.strerror}")
+
+    if size == 0:
+        return 0, 0
+
+    ranges = split_ranges(size, jobs)
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        results = list(pool.map(
+            lambda r: copy_range(fd_src, fd_dst, r[0], r[1], buffer_size), ranges))
+
+    bytes_copied = 0
+    crc32 = 0
+    for (start, end), (n, range_crc, syscalls) in zip(ranges, results):
+        STATS["syscalls"] += syscalls
+        STATS["alloc"] += min(buffer_size, end - start)
+        if n != end - start:
+            error_exit(E_READ, "source changed size during copy")
+        crc32 = crc32_combine(crc32, range_crc, n)
+        bytes_copied += n
+
+    return bytes_copied, crc32
+
+def seek_extent(fd, offset, whence, size):
+    """lseek with SEEK_DATA/SEEK_HOLE, clamped to size (ENXIO means no more data)."""
+    try:
+        pos = os.lseek(fd, offset, whence)
+    except OSError as e:
+        if e.errno == errno.ENXIO:
+            return size
+        error_exit(E_READ, f"cannot seek source extents: {e.strerror}")
+    STATS["syscalls"] += 1
+    return min(pos, size)
+
+def copy_file_sparse(fd_src, fd_dst, buffer_size):
+    """
+    Copy only the data extents of a regular file, leaving holes unwritten
+    in the destination. Holes still count towards the CRC32 as zero bytes.
+    Returns (logical_bytes, physical_bytes, crc32_value), or None if the
+    filesystem cannot report extents (nothing has been written then).
+    """
+    try:
+        os.lseek(fd_src, 0, os.SEEK_DATA)
+    except OSError as e:
+        if e.errno == errno.EINVAL:
+            return None
+        # ENXIO: no data at all, the loop below finds the same
+    STATS["syscalls"] += 1
+
+    try:
+        size = os.fstat(fd_src).st_size
+        # Drop any old destination data so skipped ranges read back as holes
+        os.ftruncate(fd_dst, 0)
+    except OSError as e:
+        error_exit(E_WRITE, f"cannot prepare sparse copy: {e.strerror}")
+
+    crc32 = 0
+    physical = 0
+    offset = 0
+
+    while offset < size:
+        data = seek_extent(fd_src, offset, os.SEEK_DATA, size)
+        crc32 = crc32_zeros(crc32, data - offset)
+        if data >= size:
+            break
+
+        hole = seek_extent(fd_src, data, os.SEEK_HOLE, size)
+        n, extent_crc, syscalls = copy_range(fd_src, fd_dst, data, hole, buffer_size)
+        STATS["syscalls"] += syscalls
+        STATS["alloc"] += min(buffer_size, hole - data)
+        if n != hole - data:
+            error_exit(E_READ, "source changed size during copy")
+
+        crc32 = crc32_combine(crc32, extent_crc, n)
+        physical += n
+        offset = hole
+
+    # A trailing hole only exists once the file is extended past it
+    try:
+        os.ftruncate(fd_dst, size)
+    except OSError as e:
+        error_exit(E_WRITE, f"cannot extend destination: {e.strerror}")
+
+    return size, physical, crc32
+
+def run_copy(fd_src, fd_dst, buffer_size, engine, jobs):
+    """
+    Pick the copy path for this pair of fds and run it.
+    Returns (bytes_copied, crc32_value)
+    """
+    # Kernel engines may share extents (reflink), so only preallocate
+    # when the data is going to be written from user space
+    # pread/pwrite ranges need offsets on both sides: a pipe, FIFO or
+    # terminal destination takes the sequential path instead, and so does
+    # a source already partly read or whose st_size does not describe it
+    parallel = jobs > 1 and source_start(fd_src) == 0 and is_regular(fd_dst)
+    userspace = parallel or engine in ("rw", "readinto") or not is_regular(fd_src)
+    preallocated = prepare_files(fd_src, fd_dst, userspace)
+
+    if parallel:
+        bytes_copied, crc32_value = copy_file_parallel(fd_src, fd_dst, buffer_size, jobs)
+    else:
+        bytes_copied, crc32_value = copy_with_engine(fd_src, fd_dst, buffer_size, engine)
+
+    # Source shrank after fallocate: drop the reserved tail again
+    if bytes_copied < preallocated:
+        try:
+            os.ftruncate(fd_dst, bytes_copied)
+        except OSError as e:
+            error_exit(E_WRITE, f"cannot truncate destination: {e.strerror}")
+
+    return bytes_copied, crc32_value
+
+def print_stats(bytes_copied):
+    """Print syscall and allocation counters to stderr (stdout is unchanged)."""
+    mb = bytes_copied / (1024 * 1024)
+    per_mb = STATS["syscalls"] / mb if mb else 0.0
+    print(f"STATS: SYSCALLS {STATS['syscalls']} PER_MB {per_mb:.1f} "
+          f"ALLOC_BYTES {STATS['alloc']}", file=sys.stderr)
+
 def close_file(fd, fd_name):
     """Close file descriptor with error handling."""
     if fd > 0:  # Don't close stdin (fd=0) if we didn't open it
@@ -141,33 +673,144 @@ def close_file(fd, fd_name):
         except OSError as e:
             error_exit(E_CLOSE, f"cannot close {fd_name}: {e.strerror}")
 
-def main():
-    # Parse arguments
-    src_path, dst_path, buffer_size, force = parse_arguments(sys.argv[1:])
+def copy_pair(src_path, dst_path, options):
+    """
+    Open, copy and close one src/dst pair.
+    Returns (output_lines, bytes_copied); errors exit via error_exit.
+    """
+    buffer_size = options["buffer_size"]
     
     # Open source
     fd_src = open_source(src_path)
     
     # Open destination
-    fd_dst = open_destination(dst_path, force)
+    try:
+        fd_dst = open_destination(dst_path, options["force"])
+    except SystemExit:
+        close_file(fd_src, "source")
+        raise
     
     try:
         # Copy data
-        bytes_copied, crc32_value = copy_file(fd_src, fd_dst, buffer_size)
+        # Extents are offsets from 0 within st_size: a partly read or
+        # procfs source is copied densely instead
+        sparse = None
+        if options["sparse"] and source_start(fd_src) == 0 and is_regular(fd_dst):
+            sparse = copy_file_sparse(fd_src, fd_dst, buffer_size)
+        if sparse is not None:
+            bytes_copied, physical, crc32_value = sparse
+        else:
+            bytes_copied, crc32_value = run_copy(fd_src, fd_dst, buffer_size,
+                                                 options["engine"], options["jobs"])
+            physical = bytes_copied
         
         # Ensure CRC32 is 32-bit unsigned
         crc32_value = crc32_value & 0xffffffff
         
-        # Output results
-        print(f"OK: COPIED {bytes_copied} BYTES")
-        print(f"OK: CRC32 {crc32_value:08x}")
-        
     finally:
         # Always close files
         close_file(fd_src, "source")
         close_file(fd_dst, "destination")
     
+    # Output results (sparse mode also reports the bytes actually moved)
+    if options["sparse"]:
+        lines = [f"OK: COPIED {bytes_copied} BYTES PHYSICAL {physical} BYTES"]
+    else:
+        lines = [f"OK: COPIED {bytes_copied} BYTES"]
+    lines.append(f"OK: CRC32 {crc32_value:08x}")
+    
+    return lines, bytes_copied
+
+def read_manifest(manifest_path):
+    """
+    Read src/dst pairs, one per line. Fields are tab separated, or split on
+    whitespace when the line has no tab. Blank lines and '#' comments are skipped.
+    """
+    try:
+        if manifest_path == "-":
+            text = sys.stdin.read()
+        else:
+            with open(manifest_path, "r") as f:
+                text = f.read()
+    except OSError as e:
+        error_exit(E_OPEN_SRC, f"cannot read manifest: {e.strerror}")
+    
+    pairs = []
+    for line_number, line in enumerate(text.splitlines(), 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        
+        fields = line.split("\t") if "\t" in line else line.split()
+        if len(fields) != 2:
+            error_exit(E_USAGE, f"manifest line {line_number}: expected 'src dst'")
+        if "-" in fields:
+            error_exit(E_USAGE, f"manifest line {line_number}: stdin is not allowed")
+        
+        pairs.append((fields[0], fields[1]))
+    
+    return pairs
+
+def run_manifest(options):
+    """
+    Copy every manifest pair in this process on a bounded thread pool.
+    Per-file lines are printed in manifest order as each copy finishes,
+    followed by an aggregate throughput line.
+    Returns the number of pairs that failed.
+    """
+    pairs = read_manifest(options["manifest"])
+    
+    def worker(pair):
+        # error_exit raises SystemExit: keep it local to this pair
+        try:
+            return copy_pair(pair[0], pair[1], options)
+        except SystemExit:
+            return None
+    
+    total_bytes = 0
+    copied = 0
+    failed = 0
+    start = time.perf_counter()
+    
+    with ThreadPoolExecutor(max_workers=options["concurrency"]) as pool:
+        for result in pool.map(worker, pairs):
+            if result is None:
+                failed += 1
+                continue
+            
+            lines, bytes_copied = result
+            for line in lines:
+                print(line)
+            total_bytes += bytes_copied
+            copied += 1
+    
+    elapsed = time.perf_counter() - start
+    mb_per_sec = total_bytes / (1024 * 1024) / elapsed if elapsed > 0 else 0.0
+    print(f"OK: TOTAL {copied} FILES {total_bytes} BYTES FAILED {failed} "
+          f"{elapsed:.3f} S {mb_per_sec:.1f} MB/S")
+    
+    if options["stats"]:
+        print_stats(total_bytes)
+    
+    return failed
+
+def main():
+    # Parse arguments
+    src_path, dst_path, options = parse_arguments(sys.argv[1:])
+    
+    # Batch mode: many pairs, one interpreter
+    if options["manifest"] is not None:
+        failed = run_manifest(options)
+        sys.exit(1 if failed else 0)
+    
+    lines, bytes_copied = copy_pair(src_path, dst_path, options)
+    for line in lines:
+        print(line)
+    
+    if options["stats"]:
+        print_stats(bytes_copied)
+    
     sys.exit(0)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,89 @@
+# 2 (benchmark)
+import sys
+import os
+import time
+import tempfile
+import subprocess
+
+# Script under test lives next to this file
+FDCOPY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "2.fdcopy.py")
+
+def error_exit(code, message):
+    """Print error message and exit with non-zero status."""
+    print(f"ERROR: {code}: {message}", file=sys.stderr)
+    sys.exit(1)
+
+def parse_arguments(args):
+    """Parse command line arguments."""
+    size_mb = 256
+    bufs = [4096, 65536, 1048576]
+    jobs = [1, 2, 4, 8]
+
+    i = 0
+    while i < len(args):
+        if i + 1 >= len(args):
+            error_exit("E_USAGE", f"missing value for {args[i]}")
+        try:
+            if args[i] == "--size-mb":
+                size_mb = int(args[i + 1])
+            elif args[i] == "--bufs":
+                bufs = [int(b) for b in args[i + 1].split(',')]
+            elif args[i] == "--jobs":
+                jobs = [int(j) for j in args[i + 1].split(',')]
+            else:
+                error_exit("E_USAGE", f"unrecognized argument: {args[i]}")
+        except ValueError:
+            error_exit("E_USAGE", f"{args[i]} takes integer values")
+        i += 2
+
+    return size_mb, bufs, jobs
+
+def make_source(path, size_mb):
+    """Write size_mb MiB of random data to path."""
+    block = os.urandom(1024 * 1024)
+    with open(path, "wb") as f:
+        for _ in range(size_mb):
+            f.write(block)
+
+def run_copy(src, dst, extra):
+    """Run fdcopy once and return (seconds, output lines)."""
+    if os.path.exists(dst):
+        os.unlink(dst)
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, FDCOPY, "--src", src, "--dst", dst] + extra,
+                          capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        error_exit("E_RUN", proc.stderr.strip())
+    return elapsed, proc.stdout.splitlines()
+
+def main():
+    size_mb, bufs, jobs = parse_arguments(sys.argv[1:])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, "src.bin")
+        dst = os.path.join(tmp, "dst.bin")
+        make_source(src, size_mb)
+
+        # Baseline: the original sequential read/write loop with the default buffer
+        base_time, base_out = run_copy(src, dst, ["--engine", "rw", "--buf", "4096"])
+        print(f"BASELINE rw buf 4096: {size_mb / base_time:8.1f} MB/s")
+
+        # Same loop without per-chunk allocation
+        reuse_time, reuse_out = run_copy(src, dst, ["--engine", "readinto", "--buf", "4096"])
+        if reuse_out != base_out:
+            error_exit("E_CRC", "output differs for readinto")
+        print(f"READINTO buf 4096:    {size_mb / reuse_time:8.1f} MB/s "
+              f"{base_time / reuse_time:7.2f}x")
+
+        print(f"{'BUF':>8} {'JOBS':>5} {'MB/s':>9} {'SPEEDUP':>8}")
+        for buf in bufs:
+            for j in jobs:
+                extra = ["--engine", "rw", "--buf", str(buf), "--jobs", str(j)]
+                elapsed, out = run_copy(src, dst, extra)
+                if out != base_out:
+                    error_exit("E_CRC", f"output differs for buf {buf} jobs {j}")
+                print(f"{buf:>8} {j:>5} {size_mb / elapsed:9.1f} {base_time / elapsed:7.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,14 @@
 # 3
 import sys
 import os
-import stat
+import heapq
+import pickle
+import tempfile
+import threading
+import time
+import sqlite3
+from itertools import chain
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 # Error codes
 E_USAGE = "E_USAGE"
@@ -9,6 +16,35 @@ E_NOTDIR = "E_NOTDIR"
 E_OPEN_DIR = "E_OPEN_DIR"
 E_READ_DIR = "E_READ_DIR"
 E_STAT = "E_STAT"
+E_RANGE = "E_RANGE"
+E_SPILL = "E_SPILL"
+E_CACHE = "E_CACHE"
+
+# Entries whose lstat calls are handed to the stat pool in one batch
+STAT_BATCH = 256
+
+# Worker pool for batched lstat calls (set up in main, None = stat inline)
+STAT_POOL = None
+
+# Debug counters printed by --debug (updated from several threads)
+STATS = {"stat_calls": 0, "stat_saved": 0}
+STATS_LOCK = threading.Lock()
+
+# Directory listing cache opened by --cache (None = always scan)
+CACHE = None
+
+# Directories kept in the cache by default before LRU eviction
+DEFAULT_CACHE_MAX = 100000
+
+# Directories modified this recently are not cached: another change in
+# the same mtime tick would go unnoticed
+CACHE_SETTLE_NS = 2 * 10**9
+
+# Heaviest directories printed by --du unless --top says otherwise
+DEFAULT_TOP = 10
+
+# Entries held in memory by --sort name/size before sorted runs spill to disk
+DEFAULT_SORT_BUDGET = 1000000
 
 def error_exit(code, message):
     """Print error message and exit with non-zero status."""
@@ -19,6 +55,17 @@ def parse_arguments(args):
     """Parse command line arguments."""
     path = None
     sort_by = "name"  # default
+    recursive = False
+    max_depth = None  # unlimited
+    jobs = 8
+    sort_budget = DEFAULT_SORT_BUDGET
+    no_size = False
+    stat_jobs = 1  # inline; a pool only pays off on cold or network filesystems
+    debug = False
+    cache_path = None
+    cache_max = DEFAULT_CACHE_MAX
+    du = False
+    top = DEFAULT_TOP
     
     i = 0
     while i < len(args):
@@ -31,8 +78,85 @@ def parse_arguments(args):
             if i + 1 >= len(args):
                 error_exit(E_USAGE, "missing value for --sort")
             sort_by = args[i + 1]
-            if sort_by not in ["name", "size"]:
-                error_exit(E_USAGE, "sort must be 'name' or 'size'")
+            if sort_by not in ["name", "size", "none"]:
+                error_exit(E_USAGE, "sort must be 'name', 'size' or 'none'")
+            i += 2
+        elif args[i] == "--recursive":
+            recursive = True
+            i += 1
+        elif args[i] == "--max-depth":
+            if i + 1 >= len(args):
+                error_exit(E_USAGE, "missing value for --max-depth")
+            try:
+                max_depth = int(args[i + 1])
+            except ValueError:
+                error_exit(E_USAGE, "max depth must be an integer")
+            if max_depth < 1:
+                error_exit(E_RANGE, "max depth must be >= 1")
+            i += 2
+        elif args[i] == "--sort-budget":
+            if i + 1 >= len(args):
+                error_exit(E_USAGE, "missing value for --sort-budget")
+            try:
+                sort_budget = int(args[i + 1])
+            except ValueError:
+                error_exit(E_USAGE, "sort budget must be an integer")
+            if sort_budget < 1:
+                error_exit(E_RANGE, "sort budget must be >= 1")
+            i += 2
+        elif args[i] == "--no-size":
+            no_size = True
+            i += 1
+        elif args[i] == "--stat-jobs":
+            if i + 1 >= len(args):
+                error_exit(E_USAGE, "missing value for --stat-jobs")
+            try:
+                stat_jobs = int(args[i + 1])
+            except ValueError:
+                error_exit(E_USAGE, "stat jobs must be an integer")
+            if stat_jobs < 1 or stat_jobs > 64:
+                error_exit(E_RANGE, "stat jobs must be 1..64")
+            i += 2
+        elif args[i] == "--cache":
+            if i + 1 >= len(args):
+                error_exit(E_USAGE, "missing value for --cache")
+            cache_path = args[i + 1]
+            i += 2
+        elif args[i] == "--cache-max":
+            if i + 1 >= len(args):
+                error_exit(E_USAGE, "missing value for --cache-max")
+            try:
+                cache_max = int(args[i + 1])
+            except ValueError:
+                error_exit(E_USAGE, "cache max must be an integer")
+            if cache_max < 1:
+                error_exit(E_RANGE, "cache max must be >= 1")
+            i += 2
+        elif args[i] == "--du":
+            du = True
+            i += 1
+        elif args[i] == "--top":
+            if i + 1 >= len(args):
+                error_exit(E_USAGE, "missing value for --top")
+            try:
+                top = int(args[i + 1])
+            except ValueError:
+                error_exit(E_USAGE, "top must be an integer")
+            if top < 1:
+                error_exit(E_RANGE, "top must be >= 1")
+            i += 2
+        elif args[i] == "--debug":
+            debug = True
+            i += 1
+        elif args[i] == "--jobs":
+            if i + 1 >= len(args):
+                error_exit(E_USAGE, "missing value for --jobs")
+            try:
+                jobs = int(args[i + 1])
+            except ValueError:
+                error_exit(E_USAGE, "jobs must be an integer")
+            if jobs < 1 or jobs > 64:
+                error_exit(E_RANGE, "jobs must be 1..64")
             i += 2
         else:
             error_exit(E_USAGE, f"unrecognized argument: {args[i]}")
@@ -40,26 +164,151 @@ def parse_arguments(args):
     if path is None:
         error_exit(E_USAGE, "missing required --path")
     
-    return path, sort_by
+    if max_depth is not None and not recursive:
+        error_exit(E_USAGE, "--max-depth requires --recursive")
+    
+    if no_size and sort_by == "size":
+        error_exit(E_USAGE, "--sort size needs sizes (drop --no-size)")
+    
+    options = {
+        "sort_by": sort_by,
+        "recursive": recursive,
+        "max_depth": max_depth,
+        "jobs": jobs,
+        "sort_budget": sort_budget,
+        "need_size": not no_size,
+        "stat_jobs": stat_jobs,
+        "debug": debug,
+        "cache_path": cache_path,
+        "cache_max": cache_max,
+        "du": du,
+        "top": top,
+    }
+    return path, options
 
-def get_entry_type(mode):
-    """Determine entry type character from stat mode."""
-    if stat.S_ISREG(mode):
-        return 'F'  # Regular file
-    elif stat.S_ISDIR(mode):
-        return 'D'  # Directory
-    elif stat.S_ISLNK(mode):
-        return 'L'  # Symbolic link
+def classify_entry(entry):
+    """
+    Determine the entry type character from the dirent d_type.
+    DirEntry only falls back to lstat when the filesystem reports DT_UNKNOWN.
+    """
+    if entry.is_symlink():
+        return 'L'
+    elif entry.is_dir(follow_symlinks=False):
+        return 'D'
+    elif entry.is_file(follow_symlinks=False):
+        return 'F'
     else:
-        return 'O'  # Other (device, pipe, socket, etc.)
+        return 'O'
+
+def count_stats(calls, saved):
+    """Add to the --debug stat counters."""
+    with STATS_LOCK:
+        STATS["stat_calls"] += calls
+        STATS["stat_saved"] += saved
+
+def lstat_size(target):
+    """Return st_size from lstat() of a DirEntry or path (or the OSError)."""
+    try:
+        return os.lstat(target).st_size
+    except OSError as e:
+        return e
 
-def list_directory(path, sort_by):
+def stat_batch(batch, prefix):
     """
-    List directory entries and return list of (name, type, size) tuples.
+    lstat a batch of (name, type, target) triples, target being the
+    DirEntry or path to stat, on STAT_POOL when there is one, and yield
+    the finished (prefix + name, type, size) tuples in batch order.
     """
-    entries = []
+    targets = [target for _, _, target in batch]
+    if STAT_POOL is not None and len(batch) > 1:
+        sizes = STAT_POOL.map(lstat_size, targets)
+    else:
+        sizes = map(lstat_size, targets)
     
-    # Check if path exists and is a directory
+    for (name, entry_type, _), size in zip(batch, sizes):
+        if isinstance(size, OSError):
+            error_exit(E_STAT, f"cannot stat '{prefix}{name}': {size.strerror}")
+        yield (prefix + name, entry_type, size)
+    
+    count_stats(len(batch), 0)
+
+class DirCache:
+    """
+    On-disk (SQLite) cache of directory listings.
+    A directory's names and types are served from the cache while its
+    st_ino and st_mtime_ns are unchanged; sizes are never taken from it,
+    since a file rewritten in place does not touch its directory's mtime.
+    Rows are evicted least-recently-used beyond max_dirs. Safe to share
+    between walker threads.
+    """
+
+    def __init__(self, db_path, max_dirs):
+        self.max_dirs = max_dirs
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        try:
+            self.db = sqlite3.connect(db_path, check_same_thread=False)
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS dirs ("
+                " path BLOB PRIMARY KEY, ino INTEGER, mtime_ns INTEGER,"
+                " entries BLOB, last_used INTEGER)")
+            self.db.execute("CREATE INDEX IF NOT EXISTS dirs_lru ON dirs (last_used)")
+            # Logical LRU clock, continued from the previous run
+            self.clock = self.db.execute(
+                "SELECT COALESCE(MAX(last_used), 0) FROM dirs").fetchone()[0]
+        except sqlite3.Error as e:
+            error_exit(E_CACHE, f"cannot open cache: {e}")
+
+    def get(self, key, st):
+        """Return the cached [(name, type)] for a directory, or None."""
+        with self.lock:
+            row = self.db.execute(
+                "SELECT ino, mtime_ns, entries FROM dirs WHERE path = ?",
+                (key,)).fetchone()
+            
+            if row is None or row[0] != st.st_ino or row[1] != st.st_mtime_ns:
+                self.misses += 1
+                return None
+            
+            self.hits += 1
+            self.clock += 1
+            self.db.execute("UPDATE dirs SET last_used = ? WHERE path = ?", (self.clock, key))
+        
+        # Listings cached by older versions also carry a size: ignored
+        return [(name, entry_type) for name, entry_type, *_ in pickle.loads(row[2])]
+
+    def put(self, key, st, entries):
+        """
+        Store the names and types of a freshly scanned listing unless the
+        directory is still settling.
+        """
+        if time.time_ns() - st.st_mtime_ns < CACHE_SETTLE_NS:
+            return
+        
+        names = [(name, entry_type) for name, entry_type, _ in entries]
+        blob = pickle.dumps(names, protocol=pickle.HIGHEST_PROTOCOL)
+        with self.lock:
+            self.clock += 1
+            self.db.execute(
+                "INSERT OR REPLACE INTO dirs (path, ino, mtime_ns, entries, last_used)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, st.st_ino, st.st_mtime_ns, blob, self.clock))
+
+    def close(self):
+        """Evict down to max_dirs (oldest first), commit and close."""
+        with self.lock:
+            try:
+                self.db.execute(
+                    "DELETE FROM dirs WHERE path IN (SELECT path FROM dirs"
+                    " ORDER BY last_used DESC LIMIT -1 OFFSET ?)", (self.max_dirs,))
+                self.db.commit()
+                self.db.close()
+            except sqlite3.Error as e:
+                error_exit(E_CACHE, f"cannot update cache: {e}")
+
+def check_directory(path):
+    """Exit with E_NOTDIR unless path is an existing directory."""
     try:
         if not os.path.exists(path):
             error_exit(E_NOTDIR, "path does not exist")
@@ -68,6 +317,16 @@ def list_directory(path, sort_by):
             error_exit(E_NOTDIR, "path is not a directory")
     except OSError as e:
         error_exit(E_NOTDIR, f"cannot access path: {e.strerror}")
+
+def iter_directory(path, prefix, subdirs, need_size=True):
+    """
+    Read one directory level, yielding (name, type, size) tuples with names
+    prefixed by prefix. (path, prefix) pairs for real directories below this
+    one are appended to subdirs (symlinks are not followed).
+    Types come from d_type; lstat is only called (in batches) when sizes
+    are needed, otherwise size is None.
+    """
+    batch = []
     
     # Open and read directory
     try:
@@ -80,43 +339,311 @@ def list_directory(path, sort_by):
                 if name in ['.', '..']:
                     continue
                 
-                # Get file info using lstat() (doesn't follow symlinks)
+                # Determine type without a stat syscall
                 try:
-                    stat_info = entry.stat(follow_symlinks=False)
+                    entry_type = classify_entry(entry)
                 except OSError as e:
-                    error_exit(E_STAT, f"cannot stat '{name}': {e.strerror}")
+                    error_exit(E_STAT, f"cannot stat '{prefix}{name}': {e.strerror}")
                 
-                # Determine type
-                entry_type = get_entry_type(stat_info.st_mode)
+                if entry_type == 'D':
+                    subdirs.append((entry.path, f"{prefix}{name}/"))
                 
-                # Get size
-                size = stat_info.st_size
+                if not need_size:
+                    count_stats(0, 1)
+                    yield (prefix + name, entry_type, None)
+                    continue
                 
-                entries.append((name, entry_type, size))
+                batch.append((name, entry_type, entry))
+                if len(batch) >= STAT_BATCH:
+                    yield from stat_batch(batch, prefix)
+                    batch = []
+            
+            yield from stat_batch(batch, prefix)
     
     except PermissionError as e:
         error_exit(E_OPEN_DIR, f"permission denied: {e.strerror}")
     except OSError as e:
         error_exit(E_OPEN_DIR, f"cannot open directory: {e.strerror}")
+
+def scan_directory(path, prefix="", need_size=True):
+    """
+    Read one directory level, through CACHE when one is open.
+    Returns (entries, subdirs) as described for iter_directory().
+    """
+    if CACHE is None:
+        subdirs = []
+        entries = list(iter_directory(path, prefix, subdirs, need_size))
+        return entries, subdirs
+    
+    try:
+        st = os.stat(path)
+    except OSError as e:
+        error_exit(E_OPEN_DIR, f"cannot open directory: {e.strerror}")
+    key = os.fsencode(os.path.abspath(path))
+    
+    # Cached listings are stored without the prefix
+    names = CACHE.get(key, st)
+    if names is None:
+        entries = list(iter_directory(path, "", [], need_size))
+        CACHE.put(key, st, entries)
+        names = [(name, entry_type) for name, entry_type, _ in entries]
+        if prefix:
+            entries = [(prefix + name, entry_type, size) for name, entry_type, size in entries]
+    elif need_size:
+        # The readdir is skipped, but sizes always come from a fresh lstat
+        entries = list(stat_batch([(name, entry_type, os.path.join(path, name))
+                                   for name, entry_type in names], prefix))
+    else:
+        entries = [(prefix + name, entry_type, None) for name, entry_type in names]
+    
+    subdirs = [(os.path.join(path, name), f"{prefix}{name}/")
+               for name, entry_type in names if entry_type == 'D']
+    return entries, subdirs
+
+def sort_key(sort_by):
+    """Key function for --sort name (name) or --sort size (size, then name)."""
+    if sort_by == "size":
+        return lambda x: (x[2], x[0])
+    return lambda x: x[0]
+
+def spill_run(run):
+    """Write one sorted run to an anonymous temp file, rewound for reading."""
+    try:
+        f = tempfile.TemporaryFile()
+        pickler = pickle.Pickler(f, protocol=pickle.HIGHEST_PROTOCOL)
+        for entry in run:
+            pickler.dump(entry)
+        f.seek(0)
+    except OSError as e:
+        error_exit(E_SPILL, f"cannot write sort run: {e.strerror}")
+    return f
+
+def read_run(f):
+    """Yield the entries of a spilled run in order."""
+    unpickler = pickle.Unpickler(f)
+    while True:
+        try:
+            yield unpickler.load()
+        except EOFError:
+            return
+
+def sort_bounded(entries, sort_by, budget):
+    """
+    Sort an iterable of (name, type, size) tuples holding at most budget
+    entries in memory. Below the budget this is a plain list sort; above
+    it, sorted runs are spilled to temp files and k-way merged with
+    heapq.merge. Keys are unique, so both paths give identical order.
+    """
+    key = sort_key(sort_by)
+    runs = []
+    run = []
+    
+    for entry in entries:
+        run.append(entry)
+        if len(run) >= budget:
+            run.sort(key=key)
+            runs.append(spill_run(run))
+            run = []
+    
+    run.sort(key=key)
+    if not runs:
+        return run
+    
+    return merge_runs(runs, run, key)
+
+def merge_runs(runs, last_run, key):
+    """Merge spilled runs plus the in-memory tail, closing the temp files."""
+    try:
+        yield from heapq.merge(*[read_run(f) for f in runs], last_run, key=key)
+    finally:
+        for f in runs:
+            f.close()
+
+def list_directory(path, sort_by, budget=DEFAULT_SORT_BUDGET, need_size=True):
+    """
+    List directory entries and return an iterable of (name, type, size)
+    tuples in the requested order (scandir order for --sort none).
+    """
+    # Check if path exists and is a directory
+    check_directory(path)
+    
+    if CACHE is None:
+        entries = iter_directory(path, "", [], need_size)
+    else:
+        entries, _ = scan_directory(path, "", need_size)
     
     # Sort entries
-    if sort_by == "name":
-        entries.sort(key=lambda x: x[0])  # Sort by name
-    elif sort_by == "size":
-        # Sort by size, then by name for ties
-        entries.sort(key=lambda x: (x[2], x[0]))
+    if sort_by == "none":
+        return entries
+    return sort_bounded(entries, sort_by, budget)
+
+def walk_tree(path, max_depth, jobs, need_size=True):
+    """
+    Walk the tree below path with a pool of scandir workers.
+    Yields one list of (relative_name, type, size) tuples per directory as
+    soon as that directory has been read; directories come out in
+    completion order. Only the frontier of unread directories is held.
+    """
+    check_directory(path)
     
-    return entries
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        # Entries of the top directory are at depth 1
+        pending = {pool.submit(scan_directory, path, "", need_size): 1}
+        
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                depth = pending.pop(future)
+                # Re-raises SystemExit from error_exit in the worker
+                entries, subdirs = future.result()
+                
+                if max_depth is None or depth < max_depth:
+                    for sub_path, sub_prefix in subdirs:
+                        future = pool.submit(scan_directory, sub_path, sub_prefix, need_size)
+                        pending[future] = depth + 1
+                
+                yield entries
+
+def scan_usage(path, seen, seen_lock):
+    """
+    Read one directory level for --du.
+    Returns (allocated, apparent, subdir_names) for the directory itself
+    plus its non-directory entries. Files with several hard links are
+    counted once, tracked by (st_dev, st_ino) in the shared seen set.
+    """
+    try:
+        st = os.lstat(path)
+    except OSError as e:
+        error_exit(E_STAT, f"cannot stat '{path}': {e.strerror}")
+    allocated = st.st_blocks * 512
+    apparent = st.st_size
+    subdir_names = []
+    
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    # Counted when the subdirectory itself is scanned
+                    subdir_names.append(entry.name)
+                    continue
+                
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                except OSError as e:
+                    error_exit(E_STAT, f"cannot stat '{entry.path}': {e.strerror}")
+                
+                if st.st_nlink > 1:
+                    with seen_lock:
+                        if (st.st_dev, st.st_ino) in seen:
+                            continue
+                        seen.add((st.st_dev, st.st_ino))
+                
+                allocated += st.st_blocks * 512
+                apparent += st.st_size
+    
+    except PermissionError as e:
+        error_exit(E_OPEN_DIR, f"permission denied: {e.strerror}")
+    except OSError as e:
+        error_exit(E_OPEN_DIR, f"cannot open directory: {e.strerror}")
+    
+    return allocated, apparent, subdir_names
+
+def rollup_tree(path, jobs, top):
+    """
+    Compute du-style subtree totals in one parallel pass.
+    Only directories still waiting on a child scan are kept; a finished
+    directory adds its totals to its parent and competes for a place in a
+    min-heap of the top heaviest (by allocated bytes).
+    Returns (heaviest_first, root_node).
+    """
+    check_directory(path)
+    
+    seen = set()
+    seen_lock = threading.Lock()
+    heaviest = []  # (allocated, apparent, name), smallest on top
+    root = None
+    
+    def finish(node):
+        # Cascade upwards while directories complete
+        while node is not None and node["pending"] == 0:
+            entry = (node["allocated"], node["apparent"], node["name"])
+            if len(heaviest) < top:
+                heapq.heappush(heaviest, entry)
+            elif entry > heaviest[0]:
+                heapq.heapreplace(heaviest, entry)
+            
+            parent = node["parent"]
+            if parent is not None:
+                parent["allocated"] += node["allocated"]
+                parent["apparent"] += node["apparent"]
+                parent["pending"] -= 1
+            node = parent
+    
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        root = {"name": ".", "path": path, "parent": None,
+                "pending": 0, "allocated": 0, "apparent": 0, "dirs": 1}
+        pending = {pool.submit(scan_usage, path, seen, seen_lock): root}
+        
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                node = pending.pop(future)
+                allocated, apparent, subdir_names = future.result()
+                node["allocated"] += allocated
+                node["apparent"] += apparent
+                node["pending"] = len(subdir_names)
+                root["dirs"] += len(subdir_names)
+                
+                for name in subdir_names:
+                    child = {"name": name if node is root else f"{node['name']}/{name}",
+                             "path": os.path.join(node["path"], name), "parent": node,
+                             "pending": 0, "allocated": 0, "apparent": 0}
+                    pending[pool.submit(scan_usage, child["path"], seen, seen_lock)] = child
+                
+                finish(node)
+    
+    return sorted(heaviest, reverse=True), root
+
+def report_usage(path, options):
+    """Print the --du report: top directories, then the tree total."""
+    heaviest, root = rollup_tree(path, options["jobs"], options["top"])
+    
+    for allocated, apparent, name in heaviest:
+        print(f"DU {allocated} {apparent} {name}")
+    
+    print(f"OK: DU ALLOCATED {root['allocated']} APPARENT {root['apparent']} DIRS {root['dirs']}")
+    sys.exit(0)
 
 def main():
+    global STAT_POOL, CACHE
+    
     # Parse arguments
-    path, sort_by = parse_arguments(sys.argv[1:])
+    path, options = parse_arguments(sys.argv[1:])
+    sort_by = options["sort_by"]
+    need_size = options["need_size"]
+    
+    # Disk usage rollup is its own report
+    if options["du"]:
+        report_usage(path, options)
+    
+    if need_size and options["stat_jobs"] > 1:
+        STAT_POOL = ThreadPoolExecutor(max_workers=options["stat_jobs"])
     
-    # Get directory entries
-    entries = list_directory(path, sort_by)
+    if options["cache_path"] is not None:
+        CACHE = DirCache(options["cache_path"], options["cache_max"])
     
-    # Counters for summary
-    total = len(entries)
+    # Get directory entries as a stream of (name, type, size) tuples
+    if not options["recursive"]:
+        entries = list_directory(path, sort_by, options["sort_budget"], need_size)
+    else:
+        # One batch per directory, in the order directories are read
+        entries = chain.from_iterable(
+            walk_tree(path, options["max_depth"], options["jobs"], need_size))
+        if sort_by != "none":
+            entries = sort_bounded(entries, sort_by, options["sort_budget"])
+    
+    # Counters for summary, summed over every directory in the subtree
+    total = 0
     files = 0
     dirs = 0
     links = 0
@@ -124,9 +651,10 @@ def main():
     
     # Output each entry
     for name, entry_type, size in entries:
-        print(f"ENTRY {entry_type} {size} {name}")
+        print(f"ENTRY {entry_type} {'-' if size is None else size} {name}")
         
         # Update counters
+        total += 1
         if entry_type == 'F':
             files += 1
         elif entry_type == 'D':
@@ -137,7 +665,15 @@ def main():
             other += 1
     
     # Output summary
-    print(f"OK: TOTAL {total} FILES {files} DIRS {dirs} LINKS {links} OTHER {other}")
+    summary = f"OK: TOTAL {total} FILES {files} DIRS {dirs} LINKS {links} OTHER {other}"
+    if CACHE is not None:
+        CACHE.close()
+        summary += f" CACHE HITS {CACHE.hits} MISSES {CACHE.misses}"
+    print(summary)
+    
+    if options["debug"]:
+        print(f"DEBUG: STAT_CALLS {STATS['stat_calls']} STAT_SAVED {STATS['stat_saved']}",
+              file=sys.stderr)
     
     sys.exit(0)
 
@@ -157,4 +693,16 @@ ln -s file1.txt testdir/link1
 
 $ python dirreport.py --path testdir
 
+# Types only, no stat syscalls at all
+$ python dirreport.py --path testdir --no-size --debug
+
+# Repeated runs: unchanged directories come from the cache
+$ python dirreport.py --path testdir --recursive --cache /tmp/dirreport.db
+
+# Ten heaviest subtrees by allocated bytes (hard links counted once)
+$ python dirreport.py --path testdir --du --top 10
+
+# Whole tree, streamed in discovery order, at most two levels deep
+$ python dirreport.py --path testdir --recursive --sort none --max-depth 2
+
 '''
\ No newline at end of file
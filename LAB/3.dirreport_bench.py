@@ -0,0 +1,72 @@
+# 3 (benchmark)
+import sys
+import os
+import time
+import tempfile
+import subprocess
+
+# Script under test lives next to this file
+DIRREPORT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "3.dirreport.py")
+
+def error_exit(code, message):
+    """Print error message and exit with non-zero status."""
+    print(f"ERROR: {code}: {message}", file=sys.stderr)
+    sys.exit(1)
+
+def parse_arguments(args):
+    """Parse command line arguments."""
+    entries = 1000000
+
+    i = 0
+    while i < len(args):
+        if args[i] == "--entries":
+            if i + 1 >= len(args):
+                error_exit("E_USAGE", "missing value for --entries")
+            try:
+                entries = int(args[i + 1])
+            except ValueError:
+                error_exit("E_USAGE", "entries must be an integer")
+            i += 2
+        else:
+            error_exit("E_USAGE", f"unrecognized argument: {args[i]}")
+
+    return entries
+
+def make_directory(path, entries):
+    """Fill path with empty files (one subdirectory per 1000 entries)."""
+    for n in range(entries):
+        if n % 1000 == 999:
+            os.mkdir(os.path.join(path, f"d{n:07d}"))
+        else:
+            os.close(os.open(os.path.join(path, f"f{n:07d}"), os.O_WRONLY | os.O_CREAT, 0o644))
+
+def run_report(path, extra):
+    """Run dirreport once and return (seconds, stderr DEBUG line)."""
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, DIRREPORT, "--path", path, "--debug"] + extra,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        error_exit("E_RUN", proc.stderr.strip())
+    return elapsed, proc.stderr.strip()
+
+def main():
+    entries = parse_arguments(sys.argv[1:])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"creating {entries} entries ...")
+        make_directory(tmp, entries)
+
+        runs = [
+            ("lstat inline", ["--stat-jobs", "1"]),
+            ("lstat pool 4", ["--stat-jobs", "4"]),
+            ("lstat pool 16", ["--stat-jobs", "16"]),
+            ("d_type only", ["--no-size"]),
+            ("d_type only, unsorted", ["--no-size", "--sort", "none"]),
+        ]
+        for label, extra in runs:
+            elapsed, debug = run_report(tmp, extra)
+            print(f"{label:<24} {elapsed:7.2f} s  {entries / elapsed:10.0f} entries/s  {debug}")
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,71 @@
 #!/usr/bin/env python3
 import sys
+import io
+import mmap
+import codecs
+import re
+import gzip
+import bz2
+import lzma
+import zlib
+import locale
+import sqlite3
+import pickle
+import tempfile
+import os
+import multiprocessing
+from collections import deque
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
 
 # Error codes
 E_USAGE = "E_USAGE"
 E_EMPTY_PATTERN = "E_EMPTY_PATTERN"
 E_OPEN = "E_OPEN"
 E_READ = "E_READ"
+E_INDEX = "E_INDEX"
+
+# Search engines selectable with --engine
+ENGINES = ["auto", "mmap", "text"]
+
+# Bytes copied at a time when counting newlines between matches
+COUNT_CHUNK = 16 * 1024 * 1024
+
+# Up to this many patterns, a regex alternation finds candidate lines; past
+# it the alternation costs more per byte than the automaton, which then
+# scans the data itself
+FINDER_MAX_PATTERNS = 16
+
+# Bytes copied at a time from a mapping for the automaton scan
+SCAN_CHUNK = 1024 * 1024
+
+# Files larger than this are split into newline-aligned chunks for --jobs
+PARALLEL_CHUNK = 64 * 1024 * 1024
+
+# Compressed formats recognised by their leading magic bytes
+COMPRESSED_MAGIC = [
+    (re.compile(rb"\x1f\x8b\x08"), "gzip"),
+    # "BZh", block size 1-9, then a block or end-of-stream magic: a text
+    # line starting with "BZh" is not a bz2 stream
+    (re.compile(rb"BZh[1-9](?:1AY&SY|\x17rE8P\x90)"), "bz2"),
+    (re.compile(rb"\xfd7zXZ\x00"), "xz"),
+]
+
+# Bytes of file header needed to match COMPRESSED_MAGIC
+MAGIC_SIZE = 10
+
+# Decompressed bytes searched per step for compressed files
+DECOMPRESS_CHUNK = 1024 * 1024
+
+# Size of the newline-aligned blocks a trigram index narrows the search to
+INDEX_BLOCK = 4 * 1024 * 1024
+
+# stdout buffer size: MATCH lines are written as found, flushed in big blocks
+OUTPUT_BUFFER = 1024 * 1024
+
+# Encodings where a bytes.find of the encoded pattern finds exactly the
+# lines a str search would (ASCII-compatible, newline is a single 0x0a)
+MMAP_ENCODINGS = {"utf-8", "ascii"}
 
 def error_exit(code, message):
     """Print error message and exit with non-zero status."""
@@ -14,33 +74,99 @@ def error_exit(code, message):
 
 def parse_arguments(args):
     """Parse command line arguments."""
-    pattern = None
+    patterns = []
+    pattern_file = None
     files_str = None
+    engine = "auto"
+    jobs = 1
+    count_only = False
+    max_count = None
+    build_index = None
+    index = None
     
     i = 0
     while i < len(args):
         if args[i] == "--pattern":
             if i + 1 >= len(args):
                 error_exit(E_USAGE, "missing value for --pattern")
-            pattern = args[i + 1]
+            # Repeat --pattern to search for several patterns in one pass
+            patterns.append(args[i + 1])
+            i += 2
+        elif args[i] == "--pattern-file":
+            if i + 1 >= len(args):
+                error_exit(E_USAGE, "missing value for --pattern-file")
+            pattern_file = args[i + 1]
             i += 2
         elif args[i] == "--files":
             if i + 1 >= len(args):
                 error_exit(E_USAGE, "missing value for --files")
             files_str = args[i + 1]
             i += 2
+        elif args[i] == "--engine":
+            if i + 1 >= len(args):
+                error_exit(E_USAGE, "missing value for --engine")
+            engine = args[i + 1]
+            if engine not in ENGINES:
+                error_exit(E_USAGE, "engine must be one of " + "|".join(ENGINES))
+            i += 2
+        elif args[i] == "--jobs":
+            if i + 1 >= len(args):
+                error_exit(E_USAGE, "missing value for --jobs")
+            try:
+                jobs = int(args[i + 1])
+            except ValueError:
+                error_exit(E_USAGE, "jobs must be an integer")
+            if jobs < 1 or jobs > 64:
+                error_exit(E_USAGE, "jobs must be 1..64")
+            i += 2
+        elif args[i] == "--build-index":
+            if i + 1 >= len(args):
+                error_exit(E_USAGE, "missing value for --build-index")
+            build_index = args[i + 1]
+            i += 2
+        elif args[i] == "--index":
+            if i + 1 >= len(args):
+                error_exit(E_USAGE, "missing value for --index")
+            index = args[i + 1]
+            i += 2
+        elif args[i] == "--count-only":
+            count_only = True
+            i += 1
+        elif args[i] == "--max-count":
+            if i + 1 >= len(args):
+                error_exit(E_USAGE, "missing value for --max-count")
+            try:
+                max_count = int(args[i + 1])
+            except ValueError:
+                error_exit(E_USAGE, "max count must be an integer")
+            if max_count < 1:
+                error_exit(E_USAGE, "max count must be >= 1")
+            i += 2
         else:
             error_exit(E_USAGE, f"unrecognized argument: {args[i]}")
     
-    if pattern is None:
+    # Validate pattern
+    if "" in patterns:
+        error_exit(E_EMPTY_PATTERN, "pattern must be non-empty")
+    
+    # One pattern per line; blank lines are skipped
+    if pattern_file is not None:
+        try:
+            with open(pattern_file, 'r') as f:
+                patterns.extend(line.rstrip('\n') for line in f if line.rstrip('\n'))
+        except OSError as e:
+            error_exit(E_OPEN, f"cannot open '{pattern_file}': {e.strerror}")
+        if not patterns:
+            error_exit(E_EMPTY_PATTERN, "pattern file has no patterns")
+    
+    # --build-index only needs the file list
+    if build_index is not None and index is not None:
+        error_exit(E_USAGE, "--build-index cannot be combined with --index")
+    if not patterns and build_index is None:
         error_exit(E_USAGE, "missing required --pattern")
     if files_str is None:
         error_exit(E_USAGE, "missing required --files")
     
-    # Validate pattern
-    if pattern == "":
-        error_exit(E_EMPTY_PATTERN, "pattern must be non-empty")
-    
     # Parse file list
     if files_str.endswith(','):
         error_exit(E_USAGE, "invalid file list: trailing comma")
@@ -54,20 +180,841 @@ def parse_arguments(args):
     if '' in [f.strip() for f in files_str.split(',')]:
         error_exit(E_USAGE, "file list contains empty entries")
     
-    return pattern, files
+    options = {
+        "engine": engine,
+        "jobs": jobs,
+        "count_only": count_only,
+        "max_count": max_count,
+        # Tagged output and per-pattern counts once there is a pattern set
+        "multi": len(patterns) > 1 or pattern_file is not None,
+        "build_index": build_index,
+        "index": index,
+    }
+    return patterns, files, options
+
+def build_automaton(patterns):
+    """
+    Build an Aho-Corasick automaton for a list of str or bytes patterns.
+    Returns (goto, fail, out, first, finder, rows): goto[state] maps a
+    symbol (char or byte value) to the next state, fail[state] is the
+    failure link, out[state] the frozenset of pattern indices ending there,
+    first a compiled regex matching any symbol that can leave the root
+    state (None if no pattern can match), finder a compiled alternation of
+    all patterns that jumps to candidate lines at C speed (None past
+    FINDER_MAX_PATTERNS patterns), and rows the dense byte transition rows
+    filled in by automaton_row().
+    """
+    goto = [{}]
+    out = [set()]
+    usable = []
+    
+    for index, pattern in enumerate(patterns):
+        # Lines never contain a newline, so such a pattern cannot match
+        if (10 if isinstance(pattern, bytes) else '\n') in pattern:
+            continue
+        usable.append(pattern)
+        state = 0
+        for symbol in pattern:
+            if symbol not in goto[state]:
+                goto.append({})
+                out.append(set())
+                goto[state][symbol] = len(goto) - 1
+            state = goto[state][symbol]
+        out[state].add(index)
+    
+    # Breadth-first: failure links and inherited outputs
+    fail = [0] * len(goto)
+    queue = deque(goto[0].values())
+    while queue:
+        state = queue.popleft()
+        for symbol, nxt in goto[state].items():
+            queue.append(nxt)
+            f = fail[state]
+            while f and symbol not in goto[f]:
+                f = fail[f]
+            fail[nxt] = goto[f][symbol] if symbol in goto[f] and goto[f][symbol] != nxt else 0
+            out[nxt] |= out[fail[nxt]]
+    
+    first = finder = None
+    if usable and isinstance(usable[0], bytes):
+        first = re.compile(b"[" + b"".join(re.escape(bytes([b])) for b in goto[0]) + b"]")
+        if len(usable) <= FINDER_MAX_PATTERNS:
+            finder = re.compile(b"|".join(re.escape(p) for p in usable))
+    elif usable:
+        first = re.compile("[" + "".join(re.escape(ch) for ch in goto[0]) + "]")
+        if len(usable) <= FINDER_MAX_PATTERNS:
+            finder = re.compile("|".join(re.escape(p) for p in usable))
+    
+    rows = [None] * len(goto)
+    return goto, fail, [frozenset(o) for o in out], first, finder, rows
+
+def get_automaton(patterns):
+    """Automaton for a tuple of patterns, built once per process (and inherited by fork)."""
+    key = tuple(patterns)
+    if key not in AUTOMATA:
+        AUTOMATA[key] = build_automaton(list(patterns))
+    return AUTOMATA[key]
+
+# Automata built so far, keyed by the pattern tuple
+AUTOMATA = {}
+
+def automaton_row(automaton, state):
+    """
+    Dense transition row of a bytes automaton state: row[byte] is the next
+    state with failure links already followed. Built from the failure
+    state's row on first use and kept, so only states the data reaches
+    cost memory.
+    """
+    goto, fail, _, _, _, rows = automaton
+    # The failure chain's rows are needed first: fill shallowest first
+    chain = []
+    s = state
+    while rows[s] is None:
+        chain.append(s)
+        if s == 0:
+            break
+        s = fail[s]
+    
+    for s in reversed(chain):
+        row = [0] * 256 if s == 0 else list(rows[fail[s]])
+        for symbol, nxt in goto[s].items():
+            row[symbol] = nxt
+        rows[s] = row
+    return rows[state]
+
+def scan_automaton(automaton, data, start, end):
+    """
+    Run the automaton over data[start:end] from the root state.
+    Yields (end_index, pattern_indices) whenever one or more patterns end.
+    While at the root, jumps straight to the next possible first symbol.
+    """
+    goto, fail, out, first, _, _ = automaton
+    if first is None:
+        return
+    state = 0
+    i = start
+    
+    while i < end:
+        if state == 0:
+            m = first.search(data, i, end)
+            if m is None:
+                return
+            i = m.start()
+        
+        symbol = data[i]
+        while state and symbol not in goto[state]:
+            state = fail[state]
+        state = goto[state].get(symbol, 0)
+        
+        if out[state]:
+            yield i, out[state]
+        i += 1
+
+def candidate_lines(automaton, buf, start, end):
+    """
+    Yield one offset inside each line of buf[start:end] (start on a line
+    boundary) where a pattern occurs. The finder jumps between candidates
+    at C speed; without one, the bytes automaton makes a single pass over
+    SCAN_CHUNK copies of the buffer, one row lookup per byte whatever the
+    number of patterns. Either way the rest of a line is skipped once it
+    has a candidate.
+    """
+    out, finder, rows = automaton[2], automaton[4], automaton[5]
+    pos = start
+    state = 0
+    
+    if finder is not None:
+        while pos < end:
+            m = finder.search(buf, pos, end)
+            if m is None:
+                return
+            yield m.start()
+            pos = buf.find(b'\n', m.start(), end) + 1 or end
+        return
+    
+    while pos < end:
+        stop = min(pos + SCAN_CHUNK, end)
+        chunk = buf[pos:stop]
+        symbols = enumerate(chunk, pos)
+        for i, symbol in symbols:
+            state = (rows[state] or automaton_row(automaton, state))[symbol]
+            if out[state]:
+                yield i
+                state = 0
+                newline = chunk.find(b'\n', i - pos)
+                if newline == -1:
+                    break
+                # Consume up to and including the newline at C speed
+                skip = newline - (i - pos)
+                next(islice(symbols, skip, skip), None)
+        else:
+            pos = stop
+            continue
+        # The candidate's line runs past this chunk
+        pos = buf.find(b'\n', stop, end) + 1 or end
+        state = 0
+
+def line_tags(automaton, line):
+    """Set of pattern indices found in one line (empty if none)."""
+    tags = set()
+    for _, indices in scan_automaton(automaton, line, 0, len(line)):
+        tags |= indices
+    return tags
+
+def encode_patterns(patterns, encoding):
+    """Encoded patterns; a pattern containing a newline can never match a line."""
+    return tuple(p.encode(encoding) for p in patterns)
+
+def count_newlines(mm, start, end):
+    """Count b'\\n' in mm[start:end], copying at most COUNT_CHUNK bytes at a time."""
+    count = 0
+    while start < end:
+        stop = min(start + COUNT_CHUNK, end)
+        count += mm[start:stop].count(b'\n')
+        start = stop
+    return count
+
+def search_region(patterns_bytes, mm, start, end, limit=None):
+    """
+    Search mm[start:end] (start and end on line boundaries), jumping from
+    match to match: bytes.find for one pattern, an Aho-Corasick scan for
+    several. Line positions come from counting newlines between matches;
+    nothing is decoded here.
+    Yields (lines_before, line_start, line_end, tags) per matching line,
+    where lines_before counts the newlines between start and the line and
+    tags is the sorted tuple of matching pattern indices (None for a single
+    pattern). Stops after limit lines when limit is set.
+    """
+    if len(patterns_bytes) > 1:
+        yield from search_region_multi(patterns_bytes, mm, start, end, limit)
+        return
+    
+    pattern_bytes = patterns_bytes[0]
+    
+    # Lines never contain a newline, so such a pattern cannot match
+    if b'\n' in pattern_bytes:
+        return
+    
+    lines_before = 0
+    counted_to = start  # newlines before this offset are in lines_before
+    found = 0
+    pos = start
+    
+    while pos < end and (limit is None or found < limit):
+        hit = mm.find(pattern_bytes, pos, end)
+        if hit == -1:
+            break
+        
+        line_start = mm.rfind(b'\n', start, hit) + 1 or start
+        line_end = mm.find(b'\n', hit, end)
+        if line_end == -1:
+            line_end = end
+        
+        lines_before += count_newlines(mm, counted_to, line_start)
+        counted_to = line_start
+        found += 1
+        
+        yield lines_before, line_start, line_end, None
+        
+        # One MATCH per line: resume after this line
+        pos = line_end + 1
+
+def search_region_multi(patterns_bytes, mm, start, end, limit=None):
+    """
+    search_region() for several patterns: candidate_lines() finds the next
+    matching line in the mapping, then the automaton tags that line once.
+    """
+    automaton = get_automaton(patterns_bytes)
+    if automaton[3] is None:
+        return
+    
+    lines_before = 0
+    counted_to = start
+    found = 0
+    
+    for hit in candidate_lines(automaton, mm, start, end):
+        line_start = mm.rfind(b'\n', start, hit) + 1 or start
+        line_end = mm.find(b'\n', hit, end)
+        if line_end == -1:
+            line_end = end
+        
+        lines_before += count_newlines(mm, counted_to, line_start)
+        counted_to = line_start
+        found += 1
+        
+        tags = line_tags(automaton, mm[line_start:line_end])
+        yield lines_before, line_start, line_end, tuple(sorted(tags))
+        if limit is not None and found >= limit:
+            break
+
+def search_text(patterns, f, limit=None):
+    """
+    Search a text stream line by line.
+    Yields (line_number, line_content, tags) per matching line, at most
+    limit; tags as for search_region().
+    """
+    automaton = get_automaton(patterns) if len(patterns) > 1 else None
+    pattern = patterns[0]
+    line_number = 0
+    found = 0
+    
+    for line in f:
+        line_number += 1
+        # Remove trailing newline but keep other whitespace
+        line_content = line.rstrip('\n')
+        
+        # Check for pattern (case-sensitive substring)
+        if automaton is None:
+            if pattern not in line_content:
+                continue
+            tags = None
+        else:
+            if automaton[4] is not None and not automaton[4].search(line_content):
+                continue
+            tags = tuple(sorted(line_tags(automaton, line_content)))
+            if not tags:
+                continue
+        
+        yield line_number, line_content, tags
+        found += 1
+        if limit is not None and found >= limit:
+            break
+
+def map_file(f):
+    """
+    Map an open binary file read-only, or return None when it cannot be
+    searched as bytes with the same result as text mode: empty or
+    unmappable files, and files containing '\\r' (text mode treats it as
+    a line break).
+    """
+    try:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    
+    if mm.find(b'\r') != -1:
+        mm.close()
+        return None
+    
+    if hasattr(mmap, "MADV_SEQUENTIAL"):
+        mm.madvise(mmap.MADV_SEQUENTIAL)
+    return mm
+
+def text_encoding():
+    """Normalized name of the encoding open(filename, 'r') would use."""
+    return codecs.lookup(locale.getpreferredencoding(False)).name
+
+def search_file(patterns, filename, f, engine, emit, limit=None):
+    """
+    Search one open binary file with the selected engine, calling
+    emit(filename, line_number, line_content, tags) per match (emit=None
+    only counts, without decoding or building lines).
+    Returns (matching_lines, per_pattern_counts).
+    """
+    encoding = text_encoding()
+    count = 0
+    pattern_counts = [0] * len(patterns)
+    
+    # gzip/bz2/xz: searched while streaming the decompressed data
+    kind = detect_compression(f)
+    if kind is not None:
+        count = search_compressed(patterns, filename, f, kind, emit, limit, pattern_counts)
+        return count, pattern_counts
+    
+    mm = None
+    if engine != "text" and encoding in MMAP_ENCODINGS:
+        mm = map_file(f)
+    
+    if mm is None:
+        # Same decoding and newline handling as open(filename, 'r');
+        # peeking and mapping leave the position at the start
+        text = io.TextIOWrapper(f, encoding=encoding)
+        try:
+            for line_number, line_content, tags in search_text(patterns, text, limit):
+                count += 1
+                for index in tags or (0,):
+                    pattern_counts[index] += 1
+                if emit is not None:
+                    emit(filename, line_number, line_content, tags)
+        finally:
+            text.detach()
+        return count, pattern_counts
+    
+    try:
+        for lines_before, line_start, line_end, tags in search_region(
+                encode_patterns(patterns, encoding), mm, 0, len(mm), limit):
+            count += 1
+            for index in tags or (0,):
+                pattern_counts[index] += 1
+            if emit is not None:
+                emit(filename, 1 + lines_before, mm[line_start:line_end].decode(encoding), tags)
+    finally:
+        mm.close()
+    return count, pattern_counts
+
+def search_block(patterns, buf, start, end, encoding, limit, count_only):
+    """
+    Search buf[start:end] (an mmap or bytes, start and end on line
+    boundaries). Returns (hits, lines): hits are (lines_before,
+    line_content, tags) tuples (content None when count_only), lines is
+    the number of lines in the block. A block containing '\r' is split
+    the way text mode would.
+    """
+    hits = []
+    
+    if encoding in MMAP_ENCODINGS and buf.find(b'\r', start, end) == -1:
+        last_lines, last_start = 0, start
+        for lines_before, line_start, line_end, tags in search_region(
+                encode_patterns(patterns, encoding), buf, start, end, limit):
+            content = None if count_only else buf[line_start:line_end].decode(encoding)
+            hits.append((lines_before, content, tags))
+            last_lines, last_start = lines_before, line_start
+        return hits, last_lines + count_newlines(buf, last_start, end)
+    
+    # Blocks end right after '\n', so '\r\n' never straddles two
+    text = io.TextIOWrapper(io.BytesIO(buf[start:end]), encoding=encoding)
+    lines = [0]
+    
+    def counted():
+        for line in text:
+            lines[0] += 1
+            yield line
+    
+    stream = counted()
+    for line_number, line_content, tags in search_text(patterns, stream, limit):
+        hits.append((line_number - 1, None if count_only else line_content, tags))
+    # Past --max-count: the rest of the block still counts as lines
+    for _ in stream:
+        pass
+    return hits, lines[0]
+
+def detect_compression(f):
+    """Return 'gzip', 'bz2' or 'xz' from the file's magic bytes, else None."""
+    head = f.peek(MAGIC_SIZE)[:MAGIC_SIZE]
+    for magic, kind in COMPRESSED_MAGIC:
+        if magic.match(head):
+            return kind
+    return None
+
+def open_decompressor(kind, f):
+    """Streaming decompressed view of an open binary file."""
+    if kind == "gzip":
+        return gzip.GzipFile(fileobj=f, mode='rb')
+    if kind == "bz2":
+        return bz2.BZ2File(f)
+    return lzma.LZMAFile(f)
+
+def search_compressed(patterns, filename, f, kind, emit, limit, pattern_counts):
+    """
+    Search a compressed file while decompressing it, DECOMPRESS_CHUNK bytes
+    at a time. The partial last line of each step is carried into the
+    next one, so matches across step boundaries are found and line numbers
+    continue. Returns the number of matching lines.
+    """
+    encoding = text_encoding()
+    count = 0
+    line_base = 1
+    carry = b""
+    
+    try:
+        with open_decompressor(kind, f) as stream:
+            while limit is None or count < limit:
+                data = stream.read(DECOMPRESS_CHUNK)
+                buf = carry + data
+                if data:
+                    # Search complete lines only, keep the rest for later
+                    end = buf.rfind(b'\n') + 1
+                    carry = buf[end:]
+                else:
+                    end = len(buf)
+                
+                remaining = None if limit is None else limit - count
+                hits, lines = search_block(patterns, buf, 0, end, encoding,
+                                           remaining, emit is None)
+                for lines_before, line_content, tags in hits:
+                    count += 1
+                    for index in tags or (0,):
+                        pattern_counts[index] += 1
+                    if emit is not None:
+                        emit(filename, line_base + lines_before, line_content, tags)
+                line_base += lines
+                
+                if not data:
+                    break
+    except (OSError, EOFError, lzma.LZMAError, zlib.error) as e:
+        # Truncated or corrupt streams surface as any of these
+        error_exit(E_READ, f"error decompressing '{filename}': {e}")
+    
+    return count
+
+def search_chunk(patterns, filename, start, end, limit, count_only):
+    """
+    Pool worker: search bytes [start, end) of filename.
+    Returns (hits, lines) as from search_block().
+    """
+    with open(filename, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return search_block(patterns, mm, start, end, text_encoding(),
+                                limit, count_only)
+
+def search_whole_file(patterns, filename, engine, limit, count_only):
+    """
+    Pool worker: search a whole file. Hits are spilled one by one to a
+    temp file instead of a list, so memory does not grow with the match
+    count. Returns (spill_path, 0); read it back with read_spill().
+    """
+    fd, spill_path = tempfile.mkstemp(prefix="greplite-")
+    try:
+        with os.fdopen(fd, 'wb') as out:
+            def collect(_, line_number, line_content, tags):
+                out.write(pickle.dumps((line_number - 1, None if count_only else line_content,
+                                        tags), protocol=pickle.HIGHEST_PROTOCOL))
+            
+            with open(filename, 'rb') as f:
+                search_file(patterns, filename, f, engine, collect, limit)
+    except BaseException:
+        os.unlink(spill_path)
+        raise
+    return spill_path, 0
+
+def read_spill(spill_path):
+    """Yield the hits search_whole_file() spilled, in order."""
+    with open(spill_path, 'rb') as f:
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                return
+
+def plan_chunks(f, engine, chunk_size=PARALLEL_CHUNK):
+    """
+    Split a file into newline-aligned (start, end) chunks of about
+    chunk_size bytes, or return None if it must be searched whole
+    (text engine, unmappable or empty file).
+    """
+    if engine == "text" or text_encoding() not in MMAP_ENCODINGS:
+        return None
+    
+    # Compressed files are decompressed by one worker each
+    if detect_compression(f) is not None:
+        return None
+    
+    try:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    
+    with mm:
+        size = len(mm)
+        chunks = []
+        start = 0
+        while start < size:
+            end = mm.find(b'\n', start + chunk_size) + 1 or size
+            chunks.append((start, end))
+            start = end
+    return chunks
+
+def block_lines(buf, start, end):
+    """Lines in buf[start:end] as search_block() counts them."""
+    if buf.find(b'\r', start, end) == -1:
+        return count_newlines(buf, start, end)
+    text = io.TextIOWrapper(io.BytesIO(buf[start:end]), encoding=text_encoding())
+    return sum(1 for _ in text)
+
+def block_trigrams(buf, start, end):
+    """
+    Set of trigrams (as native-order 24-bit ints) in buf[start:end].
+    Viewing the block as 32-bit words at offsets 0..3 yields every 4-byte
+    window without a Python-level loop; each window holds two trigrams.
+    Trigrams spanning a newline are harmless extras.
+    """
+    block = buf[start:end]
+    view = memoryview(block)
+    windows = set()
+    for offset in range(4):
+        size = (len(block) - offset) // 4 * 4
+        if size > 0:
+            windows.update(view[offset:offset + size].cast("I"))
+    trigrams = {w & 0xFFFFFF for w in windows} | {w >> 8 for w in windows}
+    # Too short for a single window
+    if len(block) == 3:
+        trigrams.add(int.from_bytes(block, sys.byteorder))
+    return trigrams
+
+def index_block(filename, start, end):
+    """Pool worker for --build-index: (start, end, lines, trigrams) of one block."""
+    with open(filename, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return start, end, block_lines(mm, start, end), block_trigrams(mm, start, end)
+
+def open_index(index_path):
+    """Open (creating if needed) a trigram index database."""
+    try:
+        db = sqlite3.connect(index_path)
+        db.executescript(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " id INTEGER PRIMARY KEY, path BLOB UNIQUE, size INTEGER, mtime_ns INTEGER);"
+            "CREATE TABLE IF NOT EXISTS blocks ("
+            " id INTEGER PRIMARY KEY, file_id INTEGER, start INTEGER, end INTEGER,"
+            " lines INTEGER);"
+            "CREATE INDEX IF NOT EXISTS blocks_file ON blocks (file_id, start);"
+            "CREATE TABLE IF NOT EXISTS postings ("
+            " trigram INTEGER, block_id INTEGER, PRIMARY KEY (trigram, block_id))"
+            " WITHOUT ROWID;")
+    except sqlite3.Error as e:
+        error_exit(E_INDEX, f"cannot open index '{index_path}': {e}")
+    return db
+
+def index_key(filename):
+    """Index key of a file: its absolute path as bytes."""
+    return os.fsencode(os.path.abspath(filename))
+
+def build_index(index_path, files, jobs):
+    """
+    --build-index: record newline-aligned INDEX_BLOCK blocks of every file
+    with their line counts and trigram posting lists. Compressed and
+    unmappable files are left out (they are always scanned).
+    Returns (files_indexed, blocks_indexed).
+    """
+    db = open_index(index_path)
+    files_indexed = 0
+    blocks_indexed = 0
+    context = multiprocessing.get_context("fork")
+    
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=context) as pool:
+        for filename in files:
+            try:
+                with open(filename, 'rb') as f:
+                    st = os.fstat(f.fileno())
+                    chunks = None
+                    if detect_compression(f) is None:
+                        chunks = plan_chunks(f, "mmap", INDEX_BLOCK)
+            except OSError as e:
+                error_exit(E_OPEN, f"cannot open '{filename}': {e.strerror}")
+            
+            key = index_key(filename)
+            try:
+                row = db.execute("SELECT id FROM files WHERE path = ?", (key,)).fetchone()
+                if row is not None:
+                    db.execute("DELETE FROM postings WHERE block_id IN"
+                               " (SELECT id FROM blocks WHERE file_id = ?)", (row[0],))
+                    db.execute("DELETE FROM blocks WHERE file_id = ?", (row[0],))
+                    db.execute("DELETE FROM files WHERE id = ?", (row[0],))
+                if not chunks:
+                    continue
+                
+                file_id = db.execute("INSERT INTO files (path, size, mtime_ns) VALUES (?, ?, ?)",
+                                     (key, st.st_size, st.st_mtime_ns)).lastrowid
+                results = pool.map(index_block, [filename] * len(chunks),
+                                   [start for start, _ in chunks], [end for _, end in chunks])
+                for start, end, lines, trigrams in results:
+                    block_id = db.execute(
+                        "INSERT INTO blocks (file_id, start, end, lines) VALUES (?, ?, ?, ?)",
+                        (file_id, start, end, lines)).lastrowid
+                    db.executemany("INSERT INTO postings VALUES (?, ?)",
+                                   ((t, block_id) for t in trigrams))
+                    blocks_indexed += 1
+                files_indexed += 1
+            except OSError as e:
+                error_exit(E_READ, f"error reading '{filename}': {e.strerror}")
+            except sqlite3.Error as e:
+                error_exit(E_INDEX, f"cannot update index: {e}")
+    
+    db.commit()
+    db.close()
+    return files_indexed, blocks_indexed
 
-def search_files(pattern, files):
-    """Search for pattern in files and return results."""
-    matches = []
+def index_candidates(db, filename, f, patterns, engine):
+    """
+    Blocks of filename that may contain a match, as (start, end, first_line)
+    in file order, or None when the index cannot be used for this file
+    (no index, not indexed, changed since indexing, or text engine).
+    A block is a candidate for a pattern if it holds all of the pattern's
+    trigrams; patterns shorter than three bytes make every block a candidate.
+    """
+    if db is None or engine == "text" or text_encoding() not in MMAP_ENCODINGS:
+        return None
+    
+    st = os.fstat(f.fileno())
+    try:
+        row = db.execute("SELECT id, size, mtime_ns FROM files WHERE path = ?",
+                         (index_key(filename),)).fetchone()
+        if row is None or row[1] != st.st_size or row[2] != st.st_mtime_ns:
+            return None
+        blocks = db.execute("SELECT id, start, end, lines FROM blocks"
+                            " WHERE file_id = ? ORDER BY start", (row[0],)).fetchall()
+        
+        wanted = set()
+        for pattern in encode_patterns(patterns, text_encoding()):
+            if b'\n' in pattern:
+                continue
+            if len(pattern) < 3:
+                wanted = {block_id for block_id, _, _, _ in blocks}
+                break
+            
+            found = None
+            for i in range(len(pattern) - 2):
+                trigram = int.from_bytes(pattern[i:i + 3], sys.byteorder)
+                ids = {r[0] for r in db.execute(
+                    "SELECT block_id FROM postings WHERE trigram = ? AND block_id IN"
+                    " (SELECT id FROM blocks WHERE file_id = ?)", (trigram, row[0]))}
+                found = ids if found is None else found & ids
+                if not found:
+                    break
+            wanted |= found
+    except sqlite3.Error as e:
+        error_exit(E_INDEX, f"cannot read index: {e}")
+    
+    candidates = []
+    first_line = 1
+    for block_id, start, end, lines in blocks:
+        if block_id in wanted:
+            candidates.append((start, end, first_line))
+        first_line += lines
+    return candidates
+
+def search_indexed_file(patterns, filename, candidates, emit, limit):
+    """Search only the candidate blocks of an indexed file. Returns (count, per_pattern_counts)."""
+    encoding = text_encoding()
+    count = 0
+    pattern_counts = [0] * len(patterns)
+    
+    with open(filename, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for start, end, first_line in candidates:
+                if limit is not None and count >= limit:
+                    break
+                remaining = None if limit is None else limit - count
+                hits, _ = search_block(patterns, mm, start, end, encoding,
+                                       remaining, emit is None)
+                for lines_before, line_content, tags in hits:
+                    count += 1
+                    for index in tags or (0,):
+                        pattern_counts[index] += 1
+                    if emit is not None:
+                        emit(filename, first_line + lines_before, line_content, tags)
+    return count, pattern_counts
+
+def search_files_parallel(patterns, file_handles, options, emit, pattern_counts, index_db=None):
+    """
+    Search files on a process pool, large files as several chunks, and
+    emit matches in the same file/line order as a sequential run. Only a
+    window of tasks is in flight, so finished results do not pile up.
+    Returns the number of matching lines; pattern_counts is updated.
+    """
+    engine = options["engine"]
+    limit = options["max_count"]
+    count_only = options["count_only"]
+    jobs = options["jobs"]
+    context = multiprocessing.get_context("fork")
+    
+    total = 0
+    line_base = 1
+    file_count = 0
+    
+    def consume(task):
+        nonlocal total, line_base, file_count
+        filename, first, future, base = task
+        if first:
+            line_base = 1
+            file_count = 0
+        # Index blocks know their first line; skipped blocks are not run
+        if base is not None:
+            line_base = base
+        
+        try:
+            hits, lines = future.result()
+        except OSError as e:
+            error_exit(E_READ, f"error reading '{filename}': {e.strerror}")
+        
+        # Whole-file tasks hand back a spill file, streamed from disk
+        spill_path = None
+        if isinstance(hits, str):
+            spill_path = hits
+            hits = read_spill(spill_path)
+        
+        try:
+            for lines_before, line_content, tags in hits:
+                # --max-count applies per file, across its chunks
+                if limit is not None and file_count >= limit:
+                    break
+                file_count += 1
+                total += 1
+                for index in tags or (0,):
+                    pattern_counts[index] += 1
+                if emit is not None:
+                    emit(filename, line_base + lines_before, line_content, tags)
+        finally:
+            if spill_path is not None:
+                hits.close()
+                os.unlink(spill_path)
+        line_base += lines
+    
+    # Build the automaton before forking so every worker inherits it
+    if len(patterns) > 1:
+        get_automaton(encode_patterns(patterns, text_encoding()))
+        get_automaton(tuple(patterns))
+    
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=context) as pool:
+        pending = deque()
+        for filename, f in file_handles:
+            if not f.seekable():
+                # A worker cannot reopen a pipe at its start (and the peek
+                # for compression already read from it): search it here,
+                # after everything queued before it
+                while pending:
+                    consume(pending.popleft())
+                try:
+                    count, file_counts = search_file(patterns, filename, f, engine,
+                                                     emit, limit)
+                except OSError as e:
+                    error_exit(E_READ, f"error reading '{filename}': {e.strerror}")
+                total += count
+                for index, n in enumerate(file_counts):
+                    pattern_counts[index] += n
+                continue
+            
+            candidates = index_candidates(index_db, filename, f, patterns, engine)
+            if candidates is not None:
+                tasks = [(pool.submit(search_chunk, patterns, filename, start, end,
+                                      limit, count_only), base)
+                         for start, end, base in candidates]
+            else:
+                chunks = plan_chunks(f, engine)
+                if chunks is None:
+                    tasks = [(pool.submit(search_whole_file, patterns, filename, engine,
+                                          limit, count_only), None)]
+                else:
+                    tasks = [(pool.submit(search_chunk, patterns, filename, start, end,
+                                          limit, count_only), None) for start, end in chunks]
+            
+            for n, (future, base) in enumerate(tasks):
+                pending.append((filename, n == 0, future, base))
+                while len(pending) > 2 * jobs:
+                    consume(pending.popleft())
+        
+        while pending:
+            consume(pending.popleft())
+    
+    return total
+
+def search_files(patterns, files, options, emit):
+    """
+    Search for the patterns in files, calling emit(filename, line_number,
+    line_content, tags) for every matching line as it is found (emit=None
+    only counts).
+    Returns (total_matches, files_processed, per_pattern_counts).
+    """
     total_matches = 0
     files_processed = 0
+    pattern_counts = [0] * len(patterns)
     
     # Try to open all files first (all-or-nothing)
     file_handles = []
     try:
         for filename in files:
             try:
-                f = open(filename, 'r')
+                f = open(filename, 'rb')
                 file_handles.append((filename, f))
             except OSError as e:
                 # Close any files we successfully opened
@@ -80,22 +1027,36 @@ def search_files(pattern, files):
             f.close()
         error_exit(E_OPEN, f"unexpected error opening files: {e}")
     
+    # Trigram index: only blocks that can match are searched
+    index_db = None
+    if options["index"] is not None:
+        if not os.path.isfile(options["index"]):
+            error_exit(E_INDEX, f"index '{options['index']}' not found")
+        index_db = open_index(options["index"])
+    
+    # Parallel mode: same results, produced by a process pool
+    if options["jobs"] > 1:
+        try:
+            total_matches = search_files_parallel(patterns, file_handles, options,
+                                                  emit, pattern_counts, index_db)
+        finally:
+            for _, f in file_handles:
+                f.close()
+        return total_matches, len(file_handles), pattern_counts
+    
     # Now search each file
     for filename, f in file_handles:
         try:
-            line_number = 0
-            file_match_count = 0
-            
-            for line in f:
-                line_number += 1
-                # Remove trailing newline but keep other whitespace
-                line_content = line.rstrip('\n')
-                
-                # Check for pattern (case-sensitive substring)
-                if pattern in line_content:
-                    matches.append(f"MATCH {filename}:{line_number}:{line_content}")
-                    total_matches += 1
-                    file_match_count += 1
+            candidates = index_candidates(index_db, filename, f, patterns, options["engine"])
+            if candidates is not None:
+                count, file_counts = search_indexed_file(patterns, filename, candidates,
+                                                         emit, options["max_count"])
+            else:
+                count, file_counts = search_file(patterns, filename, f, options["engine"],
+                                                 emit, options["max_count"])
+            total_matches += count
+            for index, n in enumerate(file_counts):
+                pattern_counts[index] += n
             
             files_processed += 1
             
@@ -107,21 +1068,43 @@ def search_files(pattern, files):
         finally:
             f.close()
     
-    return matches, total_matches, files_processed
+    return total_matches, files_processed, pattern_counts
 
 def main():
     # Parse arguments
-    pattern, files = parse_arguments(sys.argv[1:])
+    patterns, files, options = parse_arguments(sys.argv[1:])
+    
+    # --build-index: index the files and stop
+    if options["build_index"] is not None:
+        files_indexed, blocks_indexed = build_index(options["build_index"], files,
+                                                    options["jobs"])
+        print(f"OK: INDEXED {files_indexed} FILES {blocks_indexed} BLOCKS")
+        sys.exit(0)
     
-    # Search files
-    matches, total_matches, files_processed = search_files(pattern, files)
+    # Matches go out through one large buffer as soon as they are found
+    out = open(sys.stdout.fileno(), "w", buffering=OUTPUT_BUFFER,
+               encoding=sys.stdout.encoding, errors=sys.stdout.errors, closefd=False)
     
-    # Output matches
-    for match in matches:
-        print(match)
+    def emit(filename, line_number, line_content, tags):
+        if not options["multi"]:
+            out.write(f"MATCH {filename}:{line_number}:{line_content}\n")
+        else:
+            # Pattern set: tag with the 1-based numbers of every pattern found
+            tag = ",".join(f"P{index + 1}" for index in tags or (0,))
+            out.write(f"MATCH {tag} {filename}:{line_number}:{line_content}\n")
     
-    # Output summary
-    print(f"OK: MATCHES {total_matches} FILES {files_processed}")
+    # Search files (--count-only never builds a MATCH line)
+    try:
+        total_matches, files_processed, pattern_counts = search_files(
+            patterns, files, options, None if options["count_only"] else emit)
+        
+        # Output summary (lines containing each pattern, then the total)
+        if options["multi"]:
+            for index, pattern in enumerate(patterns):
+                out.write(f"OK: PATTERN P{index + 1} MATCHES {pattern_counts[index]} {pattern}\n")
+        out.write(f"OK: MATCHES {total_matches} FILES {files_processed}\n")
+    finally:
+        out.flush()
     
     sys.exit(0)
 
@@ -136,4 +1119,7 @@ uses test1.txt and test2.txt
 CL:
 python greplite.py --pattern "TODO" --files "test1.txt, test2.txt"
 python greplite.py --pattern "TODO" --files "test1.txt,, test2.txt" -> gives error: ERROR: E_USAGE: file list contains empty entries
+python greplite.py --pattern "TODO" --pattern "FIXME" --files "test1.txt, test2.txt" -> MATCH P1,P2 test1.txt:3:...
+python greplite.py --build-index logs.idx --files "test1.txt, test2.txt" -> OK: INDEXED 2 FILES 2 BLOCKS
+python greplite.py --pattern "TODO" --index logs.idx --files "test1.txt, test2.txt"
 '''
\ No newline at end of file
@@ -0,0 +1,117 @@
+# 4 (benchmark)
+import sys
+import os
+import time
+import hashlib
+import tempfile
+import subprocess
+
+# Script under test lives next to this file
+GREPLITE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "4.greplite.py")
+
+def error_exit(code, message):
+    """Print error message and exit with non-zero status."""
+    print(f"ERROR: {code}: {message}", file=sys.stderr)
+    sys.exit(1)
+
+def parse_arguments(args):
+    """Parse command line arguments."""
+    size_mb = 2048
+    engines = ["text", "mmap"]
+    extra = []
+    pattern_count = 1000
+
+    i = 0
+    while i < len(args):
+        if i + 1 >= len(args):
+            error_exit("E_USAGE", f"missing value for {args[i]}")
+        if args[i] == "--size-mb":
+            try:
+                size_mb = int(args[i + 1])
+            except ValueError:
+                error_exit("E_USAGE", "size must be an integer")
+        elif args[i] == "--engines":
+            engines = args[i + 1].split(',')
+        elif args[i] == "--extra":
+            # Extra greplite arguments, comma separated (e.g. --jobs,4)
+            extra = args[i + 1].split(',')
+        elif args[i] == "--patterns":
+            try:
+                pattern_count = int(args[i + 1])
+            except ValueError:
+                error_exit("E_USAGE", "patterns must be an integer")
+        else:
+            error_exit("E_USAGE", f"unrecognized argument: {args[i]}")
+        i += 2
+
+    return size_mb, engines, extra, pattern_count
+
+def make_log(path, size_mb):
+    """Write a synthetic log where about one line in 1000 contains ERROR."""
+    lines = []
+    for n in range(10000):
+        level = "ERROR" if n % 1000 == 7 else "INFO"
+        lines.append(f"2026-01-19 10:{n % 60:02d}:{n % 59:02d} {level} worker-{n % 32} "
+                     f"request {n} handled in {n % 997} ms\n")
+    block = "".join(lines).encode()
+
+    with open(path, "wb") as f:
+        written = 0
+        while written < size_mb * 1024 * 1024:
+            f.write(block)
+            written += len(block)
+    return written
+
+def make_patterns(path, count):
+    """Write a --pattern-file of count patterns: ERROR plus words the log never contains."""
+    with open(path, "w") as f:
+        f.write("ERROR\n")
+        for n in range(1, count):
+            # 8 hex digits: first bytes as common in the log as any
+            f.write(f"{n * 2654435761 % 2 ** 32:08x}\n")
+
+def run_search(path, engine, extra, pattern_args=("--pattern", "ERROR")):
+    """Run greplite once and return (seconds, digest of stdout)."""
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, GREPLITE] + list(pattern_args) +
+                          ["--files", path, "--engine", engine] + extra,
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        error_exit("E_RUN", proc.stderr.decode().strip())
+    return elapsed, hashlib.sha256(proc.stdout).hexdigest()
+
+def main():
+    size_mb, engines, extra, pattern_count = parse_arguments(sys.argv[1:])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "app.log")
+        size = make_log(path, size_mb)
+        mb = size / (1024 * 1024)
+
+        digests = set()
+        for engine in engines:
+            elapsed, digest = run_search(path, engine, extra)
+            digests.add(digest)
+            print(f"{engine:<6} {elapsed:8.2f} s  {mb / elapsed:9.1f} MB/s")
+
+        if len(digests) != 1:
+            error_exit("E_OUTPUT", "engines produced different output")
+
+        # Large pattern set: one --pattern-file search per engine
+        pattern_file = os.path.join(tmp, "patterns.txt")
+        make_patterns(pattern_file, pattern_count)
+        digests = set()
+        for engine in engines:
+            elapsed, digest = run_search(path, engine, extra,
+                                         ("--pattern-file", pattern_file))
+            digests.add(digest)
+            print(f"{engine:<6} {elapsed:8.2f} s  {mb / elapsed:9.1f} MB/s"
+                  f"  ({pattern_count} patterns)")
+
+        if len(digests) != 1:
+            error_exit("E_OUTPUT", "engines produced different output")
+        print("OK: OUTPUT IDENTICAL")
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,374 @@
 import sys
 import os
+import time
+import math
+import errno
+import ast
+import builtins
+import importlib
+import importlib.util
+import selectors
+import signal
+import traceback
+import threading
+import types
+import atexit
+from collections import deque
+
+# Ways to start a child: fork()+execvp(), a single posix_spawnp() call, or
+# a fork of a warm Python zygote (Python script targets only)
+SPAWN_METHODS = ["fork", "posix_spawn", "zygote"]
+
+# posix_spawnp errors that mean the child could not be created at all;
+# any other error is the exec itself failing
+SPAWN_FORK_ERRNOS = (errno.EAGAIN, errno.ENOMEM)
+
+# Per-child resource usage reported by --rusage: (label, wait4 field, format)
+RUSAGE_FIELDS = [
+    ("USER", "ru_utime", "{:.3f}"),
+    ("SYS", "ru_stime", "{:.3f}"),
+    ("MAXRSS", "ru_maxrss", "{:.0f}"),
+    ("NVCSW", "ru_nvcsw", "{:.0f}"),
+    ("NIVCSW", "ru_nivcsw", "{:.0f}"),
+]
 
 def error_exit(code, message):
     print(f"ERROR: {code}: {message}", file=sys.stderr)
     sys.exit(1)
 
+def spawn_child(cmd, cmd_args, method="fork", zygote=None):
+    """Start cmd as a child process; return the child's PID."""
+    if zygote is not None:
+        return zygote.spawn()
+
+    if method == "posix_spawn":
+        # No copy of the parent's page tables. Exec errors come back here
+        # instead of as exit status 127: fall through to fork+exec then, so
+        # the failure is reported after the child's START line as in fork
+        # mode
+        try:
+            return os.posix_spawnp(cmd, [cmd] + cmd_args, os.environ)
+        except OSError as e:
+            if e.errno in SPAWN_FORK_ERRNOS:
+                error_exit("E_FORK", "failed to spawn process")
+
+    try:
+        # Step 1: Fork
+        pid = os.fork()
+    except OSError:
+        error_exit("E_FORK", "failed to fork process")
+
+    if pid == 0:
+        # --- CHILD PROCESS ---
+        try:
+            # Step 2: Exec
+            # os.execvp(file, args_list) - first arg must be the program name
+            os.execvp(cmd, [cmd] + cmd_args)
+        except OSError:
+            # If exec fails, the child must exit immediately
+            # We exit with a special code so parent knows it's an exec failure
+            os._exit(127)
+    return pid
+
+def wait_child(pid, zygote=None):
+    """
+    Wait for child pid (-1: any child) to end.
+    Returns (pid, status, RUSAGE_FIELDS values).
+    """
+    if zygote is not None:
+        return zygote.wait()
+    pid, status, usage = os.wait4(pid, 0)
+    return pid, status, rusage_values(usage)
+
+def report_child(k, pid, status):
+    """Print the EXIT/SIG line for child k (exit 127 means exec failed)."""
+    if os.WIFEXITED(status):
+        exit_code = os.WEXITSTATUS(status)
+        # Check if the exit was actually an exec failure
+        if exit_code == 127:
+            error_exit("E_EXEC", "cannot exec program")
+        print(f"CHILD {k} PID {pid} EXIT {exit_code}")
+
+    elif os.WIFSIGNALED(status):
+        signum = os.WTERMSIG(status)
+        print(f"CHILD {k} PID {pid} SIG {signum}")
+
+def rusage_values(rusage):
+    """The RUSAGE_FIELDS values of a wait4() rusage."""
+    return [getattr(rusage, field) for _, field, _ in RUSAGE_FIELDS]
+
+def report_rusage(k, pid, values):
+    """Print child k's RUSAGE line (CPU seconds, max RSS in KB, context switches)."""
+    fields = " ".join(f"{label} {fmt.format(value)}"
+                      for (label, _, fmt), value in zip(RUSAGE_FIELDS, values))
+    print(f"CHILD {k} PID {pid} RUSAGE {fields}")
+
+def report_rusage_summary(all_values):
+    """Print min/mean/max of every RUSAGE field over all children."""
+    for index, (label, _, fmt) in enumerate(RUSAGE_FIELDS):
+        column = [values[index] for values in all_values]
+        print(f"RUSAGE {label} MIN {fmt.format(min(column))} "
+              f"MEAN {sum(column) / len(column):.3f} MAX {fmt.format(max(column))}")
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an ascending list."""
+    rank = max(1, math.ceil(len(sorted_values) * fraction))
+    return sorted_values[rank - 1]
+
+def run_parallel(cmd, cmd_args, repeat, parallel, method, rusage, zygote=None):
+    """
+    Keep up to `parallel` children in flight, reaping whichever finishes
+    first with wait4(-1). Returns the spawn-to-reap latency of every
+    child in seconds and, with rusage, each child's RUSAGE_FIELDS values.
+    """
+    in_flight = {}
+    latencies = []
+    usages = []
+    k = 0
+
+    while k < repeat or in_flight:
+        # Top the pool up before blocking in wait4
+        while k < repeat and len(in_flight) < parallel:
+            k += 1
+            started = time.perf_counter()
+            pid = spawn_child(cmd, cmd_args, method, zygote)
+            in_flight[pid] = (k, started)
+            print(f"CHILD {k} PID {pid} START")
+            if zygote is not None:
+                zygote.release(pid)
+
+        try:
+            pid, status, values = wait_child(-1, zygote)
+        except OSError:
+            error_exit("E_WAIT", "waitpid failed")
+        reaped = time.perf_counter()
+
+        if pid not in in_flight:
+            continue
+        child_k, started = in_flight.pop(pid)
+        latencies.append(reaped - started)
+        report_child(child_k, pid, status)
+        if rusage:
+            usages.append(values)
+            report_rusage(child_k, pid, values)
+
+    return latencies, usages
+
+class Zygote:
+    """
+    A forked Python process that has already imported everything a target
+    script imports. Each run is a fork of the zygote executing the script
+    as __main__, which skips interpreter startup and most import time.
+    Requests go down one pipe; "PID p" and "DONE p status rusage..." lines
+    come back up another (the runs are the zygote's children, not ours).
+    A run waits for SIGUSR1 from us, so its output follows our START line.
+    """
+
+    def __init__(self, script, script_args):
+        try:
+            with open(script, 'rb') as f:
+                code = compile(f.read(), script, 'exec')
+        except (OSError, SyntaxError, ValueError):
+            error_exit("E_EXEC", "cannot exec program")
+
+        request_read, request_write = os.pipe()
+        result_read, result_write = os.pipe()
+        # Nothing buffered may be inherited and written twice
+        sys.stdout.flush()
+        sys.stderr.flush()
+        try:
+            self.pid = os.fork()
+        except OSError:
+            error_exit("E_FORK", "failed to fork process")
+
+        if self.pid == 0:
+            os.close(request_write)
+            os.close(result_read)
+            try:
+                zygote_main(code, script, script_args, request_read, result_write)
+            finally:
+                os._exit(0)
+
+        os.close(request_read)
+        os.close(result_write)
+        self.requests = os.fdopen(request_write, 'w', buffering=1)
+        self.results = os.fdopen(result_read, 'r')
+        self.done = deque()
+
+    def read_result(self):
+        line = self.results.readline()
+        if not line:
+            error_exit("E_WAIT", "zygote exited")
+        return line.split()
+
+    def spawn(self):
+        """Start one run; return its PID."""
+        self.requests.write("RUN\n")
+        while True:
+            fields = self.read_result()
+            if fields[0] == "PID":
+                return int(fields[1])
+            # A run that finished while we were waiting for the PID
+            self.done.append(fields)
+
+    def release(self, pid):
+        """Let run pid start, once everything we printed about it is out."""
+        sys.stdout.flush()
+        os.kill(pid, signal.SIGUSR1)
+
+    def wait(self):
+        """Next finished run as (pid, status, RUSAGE_FIELDS values)."""
+        fields = self.done.popleft() if self.done else self.read_result()
+        return int(fields[1]), int(fields[2]), [float(v) for v in fields[3:]]
+
+    def close(self):
+        """Let the zygote exit once its runs are reaped, and reap it."""
+        self.requests.close()
+        os.waitpid(self.pid, 0)
+        self.results.close()
+
+def is_local_module(name, script_dir):
+    """True if top-level module name is not found or resolves under script_dir."""
+    try:
+        spec = importlib.util.find_spec(name)
+    except (ImportError, ValueError):
+        return True
+    if spec is None:
+        return True
+    locations = list(spec.submodule_search_locations or [])
+    if spec.has_location:
+        locations.append(spec.origin)
+    return any(os.path.abspath(location).startswith(script_dir + os.sep)
+               for location in locations)
+
+def warm_imports(code, script_dir):
+    """
+    Import every absolute module the script imports, ignoring failures.
+    Modules next to the script are left alone: their top-level code must
+    run in every run, as it does without the zygote.
+    """
+    for node in ast.walk(ast.parse(code)):
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            names = [node.module]
+        else:
+            continue
+        for name in names:
+            if is_local_module(name.partition(".")[0], script_dir):
+                continue
+            try:
+                importlib.import_module(name)
+            except Exception:
+                pass
+
+def zygote_main(code, script, script_args, request_fd, result_fd):
+    """
+    Zygote loop: fork a run per RUN request, report its PID, and report its
+    wait4() result when its pidfd becomes readable. Returns at end of
+    requests once every run has been reaped.
+    """
+    sys.path[0] = os.path.dirname(os.path.abspath(script))
+    with open(script, 'rb') as f:
+        warm_imports(f.read(), sys.path[0])
+
+    # Runs are held in sigwait() until released; blocked before the fork so
+    # an early SIGUSR1 stays pending instead of killing the run
+    mask = signal.pthread_sigmask(signal.SIG_BLOCK, {signal.SIGUSR1})
+
+    selector = selectors.DefaultSelector()
+    selector.register(request_fd, selectors.EVENT_READ)
+    pending = b""
+    running = 0
+    requests_open = True
+
+    while requests_open or running:
+        for key, _ in selector.select():
+            if key.fd == request_fd:
+                data = os.read(request_fd, 4096)
+                if not data:
+                    selector.unregister(request_fd)
+                    requests_open = False
+                    continue
+                pending += data
+                while b"\n" in pending:
+                    _, pending = pending.split(b"\n", 1)
+                    pid = os.fork()
+                    if pid == 0:
+                        # Pidfds of the other runs in flight are not the run's
+                        for fd in list(selector.get_map()):
+                            if fd != request_fd:
+                                os.close(fd)
+                        selector.close()
+                        os.close(request_fd)
+                        os.close(result_fd)
+                        signal.sigwait({signal.SIGUSR1})
+                        signal.pthread_sigmask(signal.SIG_SETMASK, mask)
+                        run_script(code, script, script_args)
+                    selector.register(os.pidfd_open(pid), selectors.EVENT_READ, pid)
+                    running += 1
+                    os.write(result_fd, f"PID {pid}\n".encode())
+            else:
+                selector.unregister(key.fd)
+                os.close(key.fd)
+                _, status, usage = os.wait4(key.data, 0)
+                running -= 1
+                values = " ".join(str(v) for v in rusage_values(usage))
+                os.write(result_fd, f"DONE {key.data} {status} {values}\n".encode())
+
+def run_script(code, script, script_args):
+    """In a zygote's child: run the script as `python3 script args` would."""
+    sys.argv = [script] + script_args
+    # A real __main__ module, so pickle, `import __main__` and
+    # multiprocessing find the script's own definitions
+    main_module = types.ModuleType("__main__")
+    main_module.__file__ = os.path.abspath(script)
+    main_module.__builtins__ = builtins
+    sys.modules["__main__"] = main_module
+    try:
+        exec(code, main_module.__dict__)
+        exit_code = 0
+    except SystemExit as e:
+        if e.code is None:
+            exit_code = 0
+        elif isinstance(e.code, int):
+            exit_code = e.code & 0xFF
+        else:
+            print(e.code, file=sys.stderr)
+            exit_code = 1
+    except BaseException:
+        traceback.print_exc()
+        exit_code = 1
+    try:
+        # Interpreter shutdown, in Py_FinalizeEx order: join non-daemon
+        # threads, then run atexit handlers
+        threading._shutdown()
+        atexit._run_exitfuncs()
+    except BaseException:
+        traceback.print_exc()
+    try:
+        sys.stdout.flush()
+        sys.stderr.flush()
+    finally:
+        os._exit(exit_code)
+
+def zygote_target(cmd, cmd_args):
+    """(script, script_args) from `--cmd script.py` or `--cmd python3 --args script.py,...`."""
+    if os.path.basename(cmd).startswith("python"):
+        if not cmd_args or cmd_args[0].startswith("-"):
+            error_exit("E_USAGE", "zygote runs python scripts only")
+        return cmd_args[0], cmd_args[1:]
+    return cmd, cmd_args
+
 def main():
     # 1. Parse Arguments
     args = sys.argv[1:]
     cmd = None
     cmd_args = []
     repeat = 1
+    parallel = None
+    method = "fork"
+    rusage = False
 
     i = 0
     while i < len(args):
@@ -37,55 +395,95 @@ def main():
                 i += 2
             else:
                 error_exit("E_USAGE", "missing value for --repeat")
+        elif args[i] == "--parallel":
+            if i + 1 < len(args):
+                try:
+                    parallel = int(args[i+1])
+                    if parallel < 1: raise ValueError
+                except ValueError:
+                    error_exit("E_RANGE", "parallel must be >= 1")
+                i += 2
+            else:
+                error_exit("E_USAGE", "missing value for --parallel")
+        elif args[i] == "--spawn":
+            if i + 1 < len(args):
+                method = args[i+1]
+                if method not in SPAWN_METHODS:
+                    error_exit("E_USAGE", f"spawn must be one of: {', '.join(SPAWN_METHODS)}")
+                i += 2
+            else:
+                error_exit("E_USAGE", "missing value for --spawn")
+        elif args[i] == "--rusage":
+            rusage = True
+            i += 1
         else:
             error_exit("E_USAGE", f"unrecognized argument: {args[i]}")
 
     if cmd is None:
         error_exit("E_USAGE", "missing required --cmd")
 
+    # Zygote mode: one warm Python process forks every run
+    zygote = None
+    if method == "zygote":
+        zygote = Zygote(*zygote_target(cmd, cmd_args))
+
+    # Parallel mode: a pool of up to N children, reaped as they finish
+    if parallel is not None:
+        wall_start = time.perf_counter()
+        latencies, usages = run_parallel(cmd, cmd_args, repeat, parallel, method, rusage,
+                                         zygote)
+        latencies.sort()
+        wall = time.perf_counter() - wall_start
+        if rusage:
+            report_rusage_summary(usages)
+        print(f"STATS WALL {wall:.3f} s SPAWNS/S {repeat / wall:.1f} "
+              f"P50 {percentile(latencies, 0.50) * 1000:.3f} ms "
+              f"P99 {percentile(latencies, 0.99) * 1000:.3f} ms")
+        if zygote is not None:
+            zygote.close()
+        print(f"OK: COMPLETED {repeat}")
+        return
+
     # 2. Sequential Spawning Loop
+    usages = []
     for k in range(1, repeat + 1):
+        pid = spawn_child(cmd, cmd_args, method, zygote)
+
+        # --- PARENT PROCESS ---
+        print(f"CHILD {k} PID {pid} START")
+        if zygote is not None:
+            zygote.release(pid)
+
+        # Step 3: Wait for termination
         try:
-            # Step 1: Fork
-            pid = os.fork()
+            # wait4(pid, options): waitpid plus the child's resource usage
+            _, status, values = wait_child(pid, zygote)
         except OSError:
-            error_exit("E_FORK", "failed to fork process")
+            error_exit("E_WAIT", "waitpid failed")
 
-        if pid == 0:
-            # --- CHILD PROCESS ---
-            try:
-                # Step 2: Exec
-                # os.execvp(file, args_list) - first arg must be the program name
-                os.execvp(cmd, [cmd] + cmd_args)
-            except OSError:
-                # If exec fails, the child must exit immediately
-                # We exit with a special code so parent knows it's an exec failure
-                os._exit(127) 
-        else:
-            # --- PARENT PROCESS ---
-            print(f"CHILD {k} PID {pid} START")
+        # Interpret status
+        report_child(k, pid, status)
+        if rusage:
+            usages.append(values)
+            report_rusage(k, pid, values)
 
-            # Step 3: Wait for termination
-            try:
-                # waitpid(pid, options)
-                _, status = os.waitpid(pid, 0)
-                
-                # Interpret status
-                if os.WIFEXITED(status):
-                    exit_code = os.WEXITSTATUS(status)
-                    # Check if the exit was actually an exec failure
-                    if exit_code == 127:
-                        error_exit("E_EXEC", "cannot exec program")
-                    print(f"CHILD {k} PID {pid} EXIT {exit_code}")
-                
-                elif os.WIFSIGNALED(status):
-                    signum = os.WTERMSIG(status)
-                    print(f"CHILD {k} PID {pid} SIG {signum}")
-                
-            except OSError:
-                error_exit("E_WAIT", "waitpid failed")
+    if rusage:
+        report_rusage_summary(usages)
+    if zygote is not None:
+        zygote.close()
 
     print(f"OK: COMPLETED {repeat}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
+
+
+
+'''
+CL:
+python 5.spawnwait.py --cmd true --repeat 3
+python 5.spawnwait.py --cmd sleep --args 0.01 --repeat 100 --parallel 8 -> ... STATS WALL 0.154 s SPAWNS/S 649.4 P50 12.301 ms P99 14.020 ms
+python 5.spawnwait.py --cmd true --repeat 3 --spawn posix_spawn
+python 5.spawnwait.py --cmd python3 --args job.py,--fast --repeat 100 --spawn zygote
+python 5.spawnwait.py --cmd sleep --args 0.1 --repeat 2 --rusage -> CHILD 1 PID 4242 RUSAGE USER 0.002 SYS 0.000 MAXRSS 7600 NVCSW 2 NIVCSW 0 ... RUSAGE MAXRSS MIN 7600 MEAN 7604.000 MAX 7608
+'''
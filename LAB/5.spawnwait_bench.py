@@ -0,0 +1,101 @@
+# 5 (benchmark)
+import sys
+import os
+import tempfile
+import subprocess
+
+# Script under test lives next to this file
+SPAWNWAIT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "5.spawnwait.py")
+
+# Runs spawnwait inside an interpreter that first touches N MiB of ballast,
+# so fork() has that much resident memory to copy page tables for
+BALLAST_RUNNER = (
+    "import sys, runpy\n"
+    "ballast = b'\\x01' * (int(sys.argv[1]) * 1024 * 1024)\n"
+    "sys.argv = sys.argv[2:]\n"
+    "runpy.run_path(sys.argv[0], run_name='__main__')\n"
+)
+
+# A short Python job with a typical handful of imports
+PYTHON_TARGET = (
+    "import sys, json, argparse, decimal, datetime\n"
+    "sys.exit(len(json.dumps(sys.argv)) % 2)\n"
+)
+
+def error_exit(code, message):
+    """Print error message and exit with non-zero status."""
+    print(f"ERROR: {code}: {message}", file=sys.stderr)
+    sys.exit(1)
+
+def parse_arguments(args):
+    """Parse command line arguments."""
+    rss_mb = [0, 128, 512, 2048]
+    repeat = 300
+
+    i = 0
+    while i < len(args):
+        if i + 1 >= len(args):
+            error_exit("E_USAGE", f"missing value for {args[i]}")
+        try:
+            if args[i] == "--rss-mb":
+                rss_mb = [int(r) for r in args[i + 1].split(',')]
+            elif args[i] == "--repeat":
+                repeat = int(args[i + 1])
+            else:
+                error_exit("E_USAGE", f"unrecognized argument: {args[i]}")
+        except ValueError:
+            error_exit("E_USAGE", f"{args[i]} takes integer values")
+        i += 2
+
+    return rss_mb, repeat
+
+def stats_fields(stdout):
+    """(spawns/s, p50 ms, p99 ms) from spawnwait's STATS line."""
+    for line in stdout.splitlines():
+        if line.startswith("STATS "):
+            fields = line.split()
+            return float(fields[5]), float(fields[7]), float(fields[10])
+    error_exit("E_RUN", "no STATS line in spawnwait output")
+
+def run_spawnwait(rss, method, repeat):
+    """Spawn `true` repeat times one at a time; return the STATS line fields."""
+    proc = subprocess.run([sys.executable, "-c", BALLAST_RUNNER, str(rss), SPAWNWAIT,
+                           "--cmd", "true", "--repeat", str(repeat), "--parallel", "1",
+                           "--spawn", method],
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        error_exit("E_RUN", proc.stderr.strip())
+    return stats_fields(proc.stdout)
+
+def run_python_target(script, method, repeat):
+    """Run `python3 script` repeat times one at a time; return the STATS line fields."""
+    proc = subprocess.run([sys.executable, SPAWNWAIT, "--cmd", sys.executable,
+                           "--args", script, "--repeat", str(repeat), "--parallel", "1",
+                           "--spawn", method],
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        error_exit("E_RUN", proc.stderr.strip())
+    return stats_fields(proc.stdout)
+
+def main():
+    rss_mb, repeat = parse_arguments(sys.argv[1:])
+
+    print(f"{'RSS MB':>7} {'METHOD':<12} {'SPAWNS/S':>9} {'P50 ms':>8} {'P99 ms':>8}")
+    for rss in rss_mb:
+        for method in ["fork", "posix_spawn"]:
+            rate, p50, p99 = run_spawnwait(rss, method, repeat)
+            print(f"{rss:>7} {method:<12} {rate:9.1f} {p50:8.3f} {p99:8.3f}")
+
+    # Python job: execvp of python3 (fork or posix_spawn) vs the warm zygote
+    with tempfile.TemporaryDirectory() as tmp:
+        script = os.path.join(tmp, "job.py")
+        with open(script, "w") as f:
+            f.write(PYTHON_TARGET)
+
+        print(f"{'PYTHON':>7} {'METHOD':<12} {'SPAWNS/S':>9} {'P50 ms':>8} {'P99 ms':>8}")
+        for method in ["fork", "posix_spawn", "zygote"]:
+            rate, p50, p99 = run_python_target(script, method, repeat)
+            print(f"{'':>7} {method:<12} {rate:9.1f} {p50:8.3f} {p99:8.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,12 @@
 import sys
 import os
 import argparse
-import mmap
 import struct
-import posix_ipc # Note: 'pip install posix_ipc' is usually required for POSIX semaphores
 import time
+import multiprocessing
+from multiprocessing import shared_memory
+import ctypes
+import ctypes.util
 
 # Error codes
 E_USAGE = "E_USAGE"
@@ -14,17 +16,142 @@ E_MMAP  = "E_MMAP"
 E_SEM   = "E_SEM"
 E_FORK  = "E_FORK"
 E_WAIT  = "E_WAIT"
+E_BACKEND = "E_BACKEND"
+
+# Counter backends selectable with --backend
+#   sem:     semaphore (inherited lock) around a read-modify-write of one counter
+#   atomic:  lock-free fetch-add on the shared counter (libatomic via ctypes)
+#   sharded: each process increments its own slot; the parent sums them
+BACKENDS = ["sem", "atomic", "sharded"]
+
+# Slots are a cache line apart so shard writers never share a line
+CACHE_LINE = 64
+
+# __atomic_fetch_add_8 memory order argument (__ATOMIC_SEQ_CST)
+ATOMIC_SEQ_CST = 5
+
+# Offset in a process's line of the time (perf_counter_ns) its first
+# increment was published; the first bytes hold its slot / lock stats
+FIRST_OFFSET = 24
 
 def error_exit(code, message):
     print(f"ERROR: {code}: {message}")
     sys.exit(1)
 
+def load_fetch_add():
+    """Return libatomic's __atomic_fetch_add_8(address, value, memorder)."""
+    path = ctypes.util.find_library("atomic")
+    if path is None:
+        error_exit(E_BACKEND, "atomic backend needs libatomic")
+    fetch_add = ctypes.CDLL(path).__atomic_fetch_add_8
+    fetch_add.argtypes = [ctypes.c_void_p, ctypes.c_int64, ctypes.c_int]
+    fetch_add.restype = ctypes.c_int64
+    return fetch_add
+
+def shm_size(procs):
+    """
+    Bytes of shared memory: the counter's cache line, then one line per
+    process (its shard slot or lock statistics, and its first-increment time).
+    """
+    return CACHE_LINE * (procs + 1)
+
+def local_batches(iters, batch):
+    """Count iters increments locally, yielding the delta every batch increments."""
+    pending = 0
+    for _ in range(iters):
+        pending += 1
+        if pending == batch:
+            yield pending
+            pending = 0
+    if pending:
+        yield pending
+
+def mark_first(buf, index):
+    """Record when this process published its first increment."""
+    struct.pack_into('q', buf, CACHE_LINE * (index + 1) + FIRST_OFFSET, time.perf_counter_ns())
+
+def child_sem(buf, lock, iters, batch, index, timed):
+    """
+    sem backend: lock around each flush of the local count, on the
+    inherited mapping and lock. With timed, record this process's lock
+    count and total/max hold time (ns) in its own line.
+    """
+    locks = hold_total = hold_max = 0
+    
+    for delta in local_batches(iters, batch):
+        lock.acquire()
+        if timed:
+            held_from = time.perf_counter_ns()
+        # Read 64-bit int, add the local delta, and write back
+        val = struct.unpack_from('q', buf, 0)[0]
+        struct.pack_into('q', buf, 0, val + delta)
+        if timed:
+            held = time.perf_counter_ns() - held_from
+        lock.release()
+        
+        if timed:
+            if locks == 0:
+                mark_first(buf, index)
+            locks += 1
+            hold_total += held
+            hold_max = max(hold_max, held)
+    
+    if timed:
+        struct.pack_into('qqq', buf, CACHE_LINE * (index + 1), locks, hold_total, hold_max)
+
+def child_atomic(buf, fetch_add, iters, batch, index, timed):
+    """atomic backend: fetch-add each local delta on the inherited mapping, no lock."""
+    counter = ctypes.c_int64.from_buffer(buf)
+    address = ctypes.addressof(counter)
+    first = timed
+    for delta in local_batches(iters, batch):
+        fetch_add(address, delta, ATOMIC_SEQ_CST)
+        if first:
+            mark_first(buf, index)
+            first = False
+
+def child_sharded(buf, iters, batch, index, timed):
+    """sharded backend: plain adds to this process's own slot."""
+    slot = ctypes.c_int64.from_buffer(buf, CACHE_LINE * (index + 1))
+    first = timed
+    for delta in local_batches(iters, batch):
+        slot.value += delta
+        if first:
+            mark_first(buf, index)
+            first = False
+
+def report_locks(buf, procs):
+    """Print semaphore acquisitions and hold time summed over every process."""
+    stats = [struct.unpack_from('qqq', buf, CACHE_LINE * (i + 1)) for i in range(procs)]
+    locks = sum(s[0] for s in stats)
+    hold_total = sum(s[1] for s in stats)
+    hold_max = max(s[2] for s in stats)
+    print(f"STATS LOCKS {locks} HOLD TOTAL {hold_total / 1e6:.3f} ms "
+          f"MEAN {hold_total / max(locks, 1):.0f} ns MAX {hold_max} ns")
+
+def report_startup(buf, fork_times):
+    """Print fork-to-first-increment latency over every process."""
+    latencies = [struct.unpack_from('q', buf, CACHE_LINE * (i + 1) + FIRST_OFFSET)[0] - t
+                 for i, t in enumerate(fork_times)]
+    print(f"STATS STARTUP MEAN {sum(latencies) / len(latencies) / 1000:.1f} us "
+          f"MAX {max(latencies) / 1000:.1f} us")
+
+def read_final(buf, backend, procs):
+    """Final count: the shared counter, or the sum of every shard slot."""
+    if backend == "sharded":
+        return sum(struct.unpack_from('q', buf, CACHE_LINE * (i + 1))[0]
+                   for i in range(procs))
+    return struct.unpack_from('q', buf, 0)[0]
+
 def main():
     # 1. Parse and Validate Arguments
     parser = argparse.ArgumentParser(add_help=False)
     parser.add_argument('--procs', type=int)
     parser.add_argument('--iters', type=int)
     parser.add_argument('--name')
+    parser.add_argument('--backend', default="sem")
+    parser.add_argument('--stats', action='store_true')
+    parser.add_argument('--batch', type=int, default=1)
     args, _ = parser.parse_known_args()
 
     if args.procs is None or args.iters is None or args.name is None:
@@ -36,51 +163,61 @@ def main():
         error_exit(E_RANGE, "iters must be in 1..100000")
     if not args.name.isalnum():
         error_exit(E_RANGE, "name must be alphanumeric only")
+    if args.backend not in BACKENDS:
+        error_exit(E_RANGE, f"backend must be one of: {', '.join(BACKENDS)}")
+    if args.batch < 1:
+        error_exit(E_RANGE, "batch must be >= 1")
+
+    # Resolve libatomic before any IPC objects exist
+    fetch_add = load_fetch_add() if args.backend == "atomic" else None
+    size = shm_size(args.procs)
 
-    shm_name = f"/shm_{args.name}"
-    sem_name = f"/sem_{args.name}"
+    shm_name = f"shm_{args.name}"
 
     shm = None
-    sem = None
 
     try:
         # 2. Create and Map Shared Memory
         try:
-            # Create a 8-byte shared memory object (for 64-bit int)
-            shm = posix_ipc.SharedMemory(shm_name, flags=posix_ipc.O_CREAT | posix_ipc.O_TRUNC, size=8)
-            map_file = mmap.mmap(shm.fd, 8)
+            # Create the shared memory object: a 64-bit counter and a
+            # cache line per process. A leftover object of the same name
+            # (from a killed run) is replaced, as O_CREAT | O_TRUNC did.
+            try:
+                shm = shared_memory.SharedMemory(shm_name, create=True, size=size)
+            except FileExistsError:
+                shared_memory.SharedMemory(shm_name).unlink()
+                shm = shared_memory.SharedMemory(shm_name, create=True, size=size)
+            buf = shm.buf
             # Initialize counter to 0
-            map_file.seek(0)
-            map_file.write(struct.pack('q', 0))
+            buf[:size] = bytes(size)
         except Exception as e:
             error_exit(E_SHM, f"could not create shm: {e}")
 
-        # 3. Create Semaphore
+        # 3. Create Semaphore (inherited by the children, never reopened by name)
         try:
-            sem = posix_ipc.Semaphore(sem_name, flags=posix_ipc.O_CREAT | posix_ipc.O_TRUNC, initial_value=1)
+            lock = multiprocessing.Lock()
         except Exception as e:
             error_exit(E_SEM, f"could not create semaphore: {e}")
 
         # 4. Fork Processes
+        start = time.perf_counter()
         pids = []
+        fork_times = []
         for i in range(args.procs):
             try:
+                fork_times.append(time.perf_counter_ns())
                 pid = os.fork()
                 if pid == 0: # CHILD
-                    child_shm = posix_ipc.SharedMemory(shm_name)
-                    child_map = mmap.mmap(child_shm.fd, 8)
-                    child_sem = posix_ipc.Semaphore(sem_name)
-                    
-                    for _ in range(args.iters):
-                        child_sem.acquire()
-                        # Read 64-bit int, increment, and write back
-                        child_map.seek(0)
-                        val = struct.unpack('q', child_map.read(8))[0]
-                        child_map.seek(0)
-                        child_map.write(struct.pack('q', val + 1))
-                        child_sem.release()
-                    
-                    child_map.close()
+                    # Never fall back into the parent's code (and its cleanup)
+                    try:
+                        if args.backend == "atomic":
+                            child_atomic(buf, fetch_add, args.iters, args.batch, i, args.stats)
+                        elif args.backend == "sharded":
+                            child_sharded(buf, args.iters, args.batch, i, args.stats)
+                        else:
+                            child_sem(buf, lock, args.iters, args.batch, i, args.stats)
+                    except BaseException:
+                        os._exit(1)
                     os._exit(0)
                 else:
                     pids.append(pid)
@@ -93,21 +230,27 @@ def main():
                 os.waitpid(pid, 0)
             except OSError:
                 error_exit(E_WAIT, "waitpid failed")
+        elapsed = time.perf_counter() - start
 
         # 6. Read Final Value
-        map_file.seek(0)
-        final_val = struct.unpack('q', map_file.read(8))[0]
+        final_val = read_final(buf, args.backend, args.procs)
+        if args.stats:
+            total = args.procs * args.iters
+            print(f"STATS BACKEND {args.backend} INCREMENTS {total} "
+                  f"SECONDS {elapsed:.3f} INCR/S {total / elapsed:.0f}")
+            if args.backend == "sem":
+                report_locks(buf, args.procs)
+            report_startup(buf, fork_times)
         print(f"OK: FINAL {final_val}")
 
     finally:
-        # 7. Cleanup (Unlink)
+        # 7. Cleanup (Unlink): the parent alone owns the object, so a
+        # crashed child cannot skip this; if the parent itself is killed,
+        # multiprocessing's resource tracker unlinks it
         if shm:
-            shm.close_fd()
-            try: posix_ipc.unlink_shared_memory(shm_name)
-            except: pass
-        if sem:
-            sem.close()
-            try: posix_ipc.unlink_semaphore(sem_name)
+            buf = None
+            shm.close()
+            try: shm.unlink()
             except: pass
 
 if __name__ == "__main__":
@@ -0,0 +1,76 @@
+# 6 (benchmark)
+import sys
+import os
+import subprocess
+
+# Script under test lives next to this file
+SHMCOUNTER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "6.shmcounter.py")
+
+def error_exit(code, message):
+    """Print error message and exit with non-zero status."""
+    print(f"ERROR: {code}: {message}", file=sys.stderr)
+    sys.exit(1)
+
+def parse_arguments(args):
+    """Parse command line arguments."""
+    procs = [2, 4, 8, 16]
+    iters = 100000
+    backends = ["sem", "atomic", "sharded"]
+    batches = [1, 10, 100, 1000, 10000]
+
+    i = 0
+    while i < len(args):
+        if i + 1 >= len(args):
+            error_exit("E_USAGE", f"missing value for {args[i]}")
+        try:
+            if args[i] == "--procs":
+                procs = [int(p) for p in args[i + 1].split(',')]
+            elif args[i] == "--iters":
+                iters = int(args[i + 1])
+            elif args[i] == "--backends":
+                backends = args[i + 1].split(',')
+            elif args[i] == "--batches":
+                batches = [int(k) for k in args[i + 1].split(',')]
+            else:
+                error_exit("E_USAGE", f"unrecognized argument: {args[i]}")
+        except ValueError:
+            error_exit("E_USAGE", f"{args[i]} takes integer values")
+        i += 2
+
+    return procs, iters, backends, batches
+
+def run_counter(procs, iters, extra):
+    """Run shmcounter once; return (increments/sec, STATS LOCKS line or None)."""
+    proc = subprocess.run([sys.executable, SHMCOUNTER, "--procs", str(procs),
+                           "--iters", str(iters), "--name", "bench", "--stats"] + extra,
+                          capture_output=True, text=True)
+    if proc.returncode != 0:
+        error_exit("E_RUN", proc.stdout.strip() + proc.stderr.strip())
+    lines = proc.stdout.splitlines()
+    if lines[-1] != f"OK: FINAL {procs * iters}":
+        error_exit("E_FINAL", f"wrong count: {lines[-1]}")
+    locks = next((line for line in lines if line.startswith("STATS LOCKS")), None)
+    return float(lines[0].split()[-1]), locks
+
+def main():
+    procs_list, iters, backends, batches = parse_arguments(sys.argv[1:])
+
+    print(f"{'PROCS':>5} " + " ".join(f"{b:>12}" for b in backends) + "   (increments/s)")
+    for procs in procs_list:
+        rates = [run_counter(procs, iters, ["--backend", b])[0] for b in backends]
+        print(f"{procs:>5} " + " ".join(f"{r:12.0f}" for r in rates))
+
+    # Contention sweep: semaphore backend, flushing every K local increments
+    print()
+    print(f"{'PROCS':>5} " + " ".join(f"{'K=' + str(k):>12}" for k in batches)
+          + "   (sem increments/s)")
+    for procs in procs_list:
+        results = [run_counter(procs, iters, ["--backend", "sem", "--batch", str(k)])
+                   for k in batches]
+        print(f"{procs:>5} " + " ".join(f"{rate:12.0f}" for rate, _ in results))
+        # Lock acquisitions and hold time at the smallest and largest K
+        for k, (_, locks) in [(batches[0], results[0]), (batches[-1], results[-1])]:
+            print(f"{'':>5} K={k}: {locks}")
+
+if __name__ == "__main__":
+    main()
@@ -1,44 +1,199 @@
 import sys
 import os
+import errno
+import fcntl
+import time
+import select
+
+# Ways to start a stage: fork()+execvp() or a single posix_spawnp() call
+SPAWN_METHODS = ["fork", "posix_spawn"]
+
+# posix_spawnp errors that mean the child could not be created at all;
+# any other error is the exec itself failing
+SPAWN_FORK_ERRNOS = (errno.EAGAIN, errno.ENOMEM)
+
+# Most bytes one splice() call of the --meter stage moves
+METER_CHUNK = 1024 * 1024
 
 def error_exit(msg):
     print(f"ERROR: {msg}")
     sys.exit(1)
 
+def stage_file_actions(stdin_fd, stdout_fd, pipe_fds):
+    """
+    posix_spawn file actions doing what the forked child does by hand:
+    stderr (and stdout when stdout_fd is None) to /dev/null, the stage's
+    pipe ends onto stdin/stdout, every pipe fd closed.
+    """
+    actions = [(os.POSIX_SPAWN_OPEN, 2, os.devnull, os.O_WRONLY, 0)]
+    if stdin_fd is not None:
+        actions.append((os.POSIX_SPAWN_DUP2, stdin_fd, 0))
+    if stdout_fd is not None:
+        actions.append((os.POSIX_SPAWN_DUP2, stdout_fd, 1))
+    else:
+        actions.append((os.POSIX_SPAWN_OPEN, 1, os.devnull, os.O_WRONLY, 0))
+    for fd in pipe_fds:
+        actions.append((os.POSIX_SPAWN_CLOSE, fd))
+    return actions
+
+def run_meter(link, read_fd, write_fd, report_fd):
+    """
+    Meter between two stages (forked child): splice() read_fd into
+    write_fd without copying through user space, timing how long it waits
+    for the upstream stage to produce (read) and for the downstream stage
+    to drain (write). Writes one LINK report line to report_fd.
+    """
+    readable = select.poll()
+    readable.register(read_fd, select.POLLIN)
+    writable = select.poll()
+    writable.register(write_fd, select.POLLOUT)
+    moved = 0
+    read_wait = write_wait = 0.0
+    start = time.perf_counter()
+
+    try:
+        while True:
+            waited_from = time.perf_counter()
+            readable.poll()
+            read_wait += time.perf_counter() - waited_from
+            try:
+                n = os.splice(read_fd, write_fd, METER_CHUNK,
+                              flags=os.SPLICE_F_MOVE | os.SPLICE_F_NONBLOCK)
+            except BlockingIOError:
+                # Input is ready, so the downstream pipe is full
+                waited_from = time.perf_counter()
+                writable.poll()
+                write_wait += time.perf_counter() - waited_from
+                continue
+            if n == 0:
+                break
+            moved += n
+    except BrokenPipeError:
+        # Downstream exited; our exit closes read_fd so upstream sees it too
+        pass
+
+    elapsed = time.perf_counter() - start
+    os.write(report_fd, (f"LINK {link} BYTES {moved} SECONDS {elapsed:.3f} "
+                         f"MB/S {moved / elapsed / (1024 * 1024):.1f} "
+                         f"READ_WAIT {read_wait:.3f} s WRITE_WAIT {write_wait:.3f} s\n").encode())
+
+def parse_stage(value):
+    """--stage CMD[,args]: (cmd, [args])."""
+    parts = value.split(',')
+    if not parts[0]:
+        error_exit("E_USAGE: Empty stage command")
+    return parts[0], parts[1:]
+
 def main():
     # 1. Argument Parsing
     args_raw = sys.argv[1:]
     params = {}
+    stage_list = []
+    meter = False
     i = 0
     while i < len(args_raw):
         key = args_raw[i].lstrip('-')
-        if i + 1 < len(args_raw):
-            params[key] = args_raw[i+1]
+        # --meter is the only flag without a value
+        if key == 'meter':
+            meter = True
+            i += 1
+        elif i + 1 < len(args_raw):
+            # --stage repeats: one entry per pipeline stage, in order
+            if key == 'stage':
+                stage_list.append(parse_stage(args_raw[i+1]))
+            else:
+                params[key] = args_raw[i+1]
             i += 2
         else:
             error_exit("E_USAGE: Missing value for argument")
 
-    # Required check
-    for req in ['producer', 'filter', 'consumer']:
-        if req not in params:
-            error_exit("E_USAGE: Missing required stage")
+    method = params.get('spawn', 'fork')
+    if method not in SPAWN_METHODS:
+        error_exit(f"E_USAGE: spawn must be one of: {', '.join(SPAWN_METHODS)}")
 
-    # Prepare command lists
-    stages = [
-        ("producer", params['producer'], params.get('producer-args', '').split(',') if params.get('producer-args') else []),
-        ("filter", params['filter'], params.get('filter-args', '').split(',') if params.get('filter-args') else []),
-        ("consumer", params['consumer'], params.get('consumer-args', '').split(',') if params.get('consumer-args') else [])
-    ]
+    pipe_size = None
+    if 'pipe-size' in params:
+        try:
+            pipe_size = int(params['pipe-size'])
+            if pipe_size < 1: raise ValueError
+        except ValueError:
+            error_exit("E_USAGE: pipe-size must be a positive integer")
+
+    # Prepare command lists: either N --stage entries (named 1..N) or the
+    # fixed producer/filter/consumer trio
+    if stage_list:
+        if any(req in params for req in ['producer', 'filter', 'consumer']):
+            error_exit("E_USAGE: --stage cannot be combined with named stages")
+        if len(stage_list) < 2:
+            error_exit("E_USAGE: At least two stages required")
+        stages = [(str(n), cmd, cmd_args) for n, (cmd, cmd_args) in enumerate(stage_list, 1)]
+    else:
+        # Required check
+        for req in ['producer', 'filter', 'consumer']:
+            if req not in params:
+                error_exit("E_USAGE: Missing required stage")
+
+        stages = [
+            ("producer", params['producer'], params.get('producer-args', '').split(',') if params.get('producer-args') else []),
+            ("filter", params['filter'], params.get('filter-args', '').split(',') if params.get('filter-args') else []),
+            ("consumer", params['consumer'], params.get('consumer-args', '').split(',') if params.get('consumer-args') else [])
+        ]
 
     # 2. Create Pipes
-    # pipe1: Producer -> Filter | pipe2: Filter -> Consumer
-    p1_read, p1_write = os.pipe()
-    p2_read, p2_write = os.pipe()
+    # out_pipes[k]: stage k writes | in_pipes[k]: stage k+1 reads. Without
+    # --meter they are the same pipe; with it a meter process sits between.
+    out_pipes = [os.pipe() for _ in range(len(stages) - 1)]
+    in_pipes = [os.pipe() for _ in out_pipes] if meter else out_pipes
+    pipe_fds = [fd for pipe in out_pipes + (in_pipes if meter else []) for fd in pipe]
+    if pipe_size is not None:
+        for _, write_fd in out_pipes + (in_pipes if meter else []):
+            try:
+                fcntl.fcntl(write_fd, fcntl.F_SETPIPE_SZ, pipe_size)
+            except OSError as e:
+                error_exit(f"E_PIPE: cannot set pipe size {pipe_size}: {e.strerror}")
+
+    # Meters: one forked splice() loop per link, reporting on a shared pipe
+    meter_pids = []
+    if meter:
+        report_read, report_write = os.pipe()
+        for index in range(len(out_pipes)):
+            link = f"{stages[index][0]}->{stages[index + 1][0]}"
+            read_fd, write_fd = out_pipes[index][0], in_pipes[index][1]
+            try:
+                pid = os.fork()
+            except OSError:
+                error_exit("E_FORK: Fork failed")
+            if pid == 0:  # METER
+                try:
+                    for fd in pipe_fds + [report_read]:
+                        if fd not in (read_fd, write_fd):
+                            os.close(fd)
+                    run_meter(link, read_fd, write_fd, report_write)
+                finally:
+                    os._exit(0)
+            meter_pids.append(pid)
+        os.close(report_write)
 
     pids = {}
 
     # 3. Spawn Stages
-    for name, cmd, cmd_args in stages:
+    for index, (name, cmd, cmd_args) in enumerate(stages):
+        # Stage stdin/stdout pipe ends (None: no stdin / stdout to /dev/null)
+        stdin_fd = in_pipes[index - 1][0] if index > 0 else None
+        stdout_fd = out_pipes[index][1] if index < len(out_pipes) else None
+
+        if method == "posix_spawn":
+            actions = stage_file_actions(stdin_fd, stdout_fd, pipe_fds)
+            try:
+                pids[name] = os.posix_spawnp(cmd, [cmd] + cmd_args, os.environ,
+                                             file_actions=actions)
+            except OSError as e:
+                if e.errno in SPAWN_FORK_ERRNOS:
+                    error_exit("E_FORK: Fork failed")
+                # Exec failed: reported as the forked child's exit 127 would be
+                pids[name] = None
+            continue
+
         try:
             pid = os.fork()
             if pid == 0:  # CHILD
@@ -46,20 +201,21 @@ def main():
                 devnull = os.open(os.devnull, os.O_WRONLY)
                 os.dup2(devnull, sys.stderr.fileno())
 
-                if name == "producer":
-                    os.dup2(p1_write, sys.stdout.fileno())
-                elif name == "filter":
-                    os.dup2(p1_read, sys.stdin.fileno())
-                    os.dup2(p2_write, sys.stdout.fileno())
-                elif name == "consumer":
-                    os.dup2(p2_read, sys.stdin.fileno())
-                    os.dup2(devnull, sys.stdout.fileno()) # Consumer output to devnull
+                if stdin_fd is not None:
+                    os.dup2(stdin_fd, sys.stdin.fileno())
+                if stdout_fd is not None:
+                    os.dup2(stdout_fd, sys.stdout.fileno())
+                else:
+                    os.dup2(devnull, sys.stdout.fileno()) # Last stage output to devnull
 
                 # Close all pipe fds in child
-                for fd in [p1_read, p1_write, p2_read, p2_write, devnull]:
+                for fd in pipe_fds + [devnull]:
                     os.close(fd)
 
-                os.execvp(cmd, [cmd] + cmd_args)
+                try:
+                    os.execvp(cmd, [cmd] + cmd_args)
+                except OSError:
+                    pass
                 os._exit(127) # Exec failed
             
             pids[name] = pid
@@ -67,13 +223,16 @@ def main():
             error_exit("E_FORK: Fork failed")
 
     # 4. PARENT: Close all pipe ends
-    for fd in [p1_read, p1_write, p2_read, p2_write]:
+    for fd in pipe_fds:
         os.close(fd)
 
-    # 5. Wait and Report (Check in fixed order: producer, filter, consumer)
+    # 5. Wait and Report (Check in fixed order: first stage to last)
     final_error = None
     for name, _, _ in stages:
-        _, status = os.waitpid(pids[name], 0)
+        if pids[name] is None:
+            status = 127 << 8
+        else:
+            _, status = os.waitpid(pids[name], 0)
         
         if final_error is None: # Only capture the first error found in order
             if os.WIFEXITED(status):
@@ -86,6 +245,16 @@ def main():
                 signum = os.WTERMSIG(status)
                 final_error = f"E_STAGE: stage {name} sig {signum}"
 
+    # Per-link report once every meter has seen EOF, in pipeline order
+    if meter:
+        for pid in meter_pids:
+            os.waitpid(pid, 0)
+        with os.fdopen(report_read) as reports:
+            lines = reports.read().splitlines()
+        order = {f"{stages[k][0]}->{stages[k + 1][0]}": k for k in range(len(stages) - 1)}
+        for line in sorted(lines, key=lambda line: order[line.split()[1]]):
+            print(line)
+
     if final_error:
         print(f"ERROR: {final_error}")
         sys.exit(1)
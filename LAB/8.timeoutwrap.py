@@ -11,6 +11,15 @@ E_EXEC = "E_EXEC"
 E_WAIT = "E_WAIT"
 E_SIGNAL = "E_SIGNAL"
 
+# Child resource usage reported by --rusage: (label, wait4 field, format)
+RUSAGE_FIELDS = [
+    ("USER", "ru_utime", "{:.3f}"),
+    ("SYS", "ru_stime", "{:.3f}"),
+    ("MAXRSS", "ru_maxrss", "{:.0f}"),
+    ("NVCSW", "ru_nvcsw", "{:.0f}"),
+    ("NIVCSW", "ru_nivcsw", "{:.0f}"),
+]
+
 def error_exit(code, message):
     print(f"ERROR: {code}: {message}", file=sys.stderr)
     sys.exit(1)
@@ -36,6 +45,7 @@ def main():
     seconds = None
     cmd = None
     cmd_args = []
+    rusage = False
 
     i = 0
     while i < len(args):
@@ -61,6 +71,9 @@ def main():
                 i += 2
             else:
                 error_exit(E_USAGE, "missing value for --args")
+        elif args[i] == "--rusage":
+            rusage = True
+            i += 1
         else:
             error_exit(E_USAGE, f"unrecognized argument: {args[i]}")
 
@@ -89,12 +102,18 @@ def main():
         signal.alarm(seconds)
         
         try:
-            # Wait for the child to change state
-            pid, status = os.waitpid(child_pid, 0)
+            # Wait for the child to change state (wait4 also returns its resource usage)
+            pid, status, usage = os.wait4(child_pid, 0)
             
             # Cancel the alarm because the child finished
             signal.alarm(0)
 
+            # CPU seconds, max RSS in KB and context switches, before the verdict
+            if rusage and not (os.WIFEXITED(status) and os.WEXITSTATUS(status) == 127):
+                fields = " ".join(f"{label} {fmt.format(getattr(usage, field))}"
+                                  for label, field, fmt in RUSAGE_FIELDS)
+                print(f"RUSAGE {fields}")
+
             # Analyze how the child died
             if os.WIFEXITED(status):
                 code = os.WEXITSTATUS(status)